@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import Cart, CartCourse
+from ..utils.cart_services import Queries, add_cart_items, get_invalid_course_ids
+from ...accounts.models import User
+from ...courses.models import Course, CertificatedCourse
+from ...profiles.models import Profile
+
+
+class AddCartItemsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(phone='+998900000001')
+        Profile.objects.create(user=self.user)
+        self.courses = [
+            Course.objects.create(
+                name=f'Course {i}', author='Author', description='Description', image='images/courses/course.png',
+                price=Decimal(price),
+            )
+            for i, price in enumerate(['100', '200', '300.5'])
+        ]
+
+    def create_certificated_course(self, courses: list, discount_percent: int = 0) -> CertificatedCourse:
+        certificated_course = CertificatedCourse.objects.create(
+            name='Certificated course', description='Description', image='images/courses/course.png',
+            discount_percent=discount_percent,
+        )
+        certificated_course.sub_courses.set(courses)
+        return certificated_course
+
+    def pay_course(self, course: Course) -> None:
+        """The paid course stays in the previous cart of the user"""
+        cart = Cart.objects.create(user=self.user)
+        CartCourse.objects.create(cart=cart, course=course, paid=True, insert_type=CartCourse.InsertType.PAID)
+
+    def get_cart_course_ids(self, cart: Cart) -> list:
+        return sorted(CartCourse.objects.filter(cart=cart).values_list('course_id', flat=True))
+
+    def test_duplicate_ids_are_added_once(self):
+        cart = Cart.objects.create(user=self.user)
+        course = self.courses[0]
+
+        add_cart_items([course.id, course.id, str(course.id)], [], cart)
+        add_cart_items([course.id], [], cart)
+
+        self.assertEqual(self.get_cart_course_ids(cart), [course.id])
+        self.assertEqual(cart.total, Decimal('100'))
+        self.assertEqual(cart.subtotal, Decimal('100'))
+
+    def test_courses_total(self):
+        cart = Cart.objects.create(user=self.user)
+
+        add_cart_items([self.courses[0].id, self.courses[2].id], [], cart)
+
+        self.assertEqual(self.get_cart_course_ids(cart), [self.courses[0].id, self.courses[2].id])
+        self.assertEqual(cart.total, Decimal('400.5'))
+        self.assertEqual(Cart.objects.get(id=cart.id).total, Decimal('400.5'))
+
+    def test_missing_course_is_not_added(self):
+        cart = Cart.objects.create(user=self.user)
+
+        with self.assertRaises(Course.DoesNotExist):
+            add_cart_items([self.courses[0].id, 0], [], cart)
+
+        self.assertEqual(self.get_cart_course_ids(cart), [])
+        self.assertEqual(Cart.objects.get(id=cart.id).total, Decimal('0'))
+
+    def test_paid_courses_are_rejected(self):
+        self.pay_course(self.courses[1])
+
+        self.assertEqual(get_invalid_course_ids([self.courses[0].id, self.courses[1].id], self.user),
+                         [self.courses[1].id])
+        self.assertEqual(get_invalid_course_ids([self.courses[0].id, 0, 'id'], self.user), ['id', 0])
+
+        validation = Queries().data_is_valid([self.courses[1].id, self.courses[0].id], self.user)
+        self.assertFalse(validation['is_valid'])
+        self.assertEqual(validation['invalid_id'], self.courses[1].id)
+        self.assertEqual(validation['items'], [])
+
+        validation = Queries().data_is_valid([self.courses[0].id, self.courses[2].id], self.user)
+        self.assertTrue(validation['is_valid'])
+
+    def test_certificated_course_is_expanded(self):
+        cart = Cart.objects.create(user=self.user)
+        certificated_course = self.create_certificated_course(self.courses, discount_percent=10)
+
+        add_cart_items([], [certificated_course.id, certificated_course.id], cart)
+
+        cart_courses = CartCourse.objects.filter(cart=cart)
+        self.assertEqual(self.get_cart_course_ids(cart), sorted(course.id for course in self.courses))
+        self.assertTrue(all(
+            cart_course.certificated_course_id == certificated_course.id
+            and cart_course.insert_type == CartCourse.InsertType.UNPAID
+            for cart_course in cart_courses
+        ))
+        self.assertEqual(cart.total, certificated_course.price)
+        self.assertEqual(cart.total, Decimal('540.45'))
+
+    def test_certificated_course_without_paid_sub_courses(self):
+        self.pay_course(self.courses[0])
+        cart = Cart.objects.create(user=self.user)
+        certificated_course = self.create_certificated_course(self.courses, discount_percent=10)
+
+        add_cart_items([], [certificated_course.id], cart)
+
+        self.assertEqual(self.get_cart_course_ids(cart), [self.courses[1].id, self.courses[2].id])
+        self.assertEqual(cart.total, certificated_course.get_price_for_user(self.user))
+        self.assertEqual(cart.total, Decimal('500.5'))
+
+    def test_course_and_its_certificated_course(self):
+        cart = Cart.objects.create(user=self.user)
+        certificated_course = self.create_certificated_course(self.courses[:2])
+
+        add_cart_items([self.courses[0].id], [certificated_course.id], cart)
+
+        self.assertEqual(self.get_cart_course_ids(cart), [self.courses[0].id, self.courses[1].id])
+        self.assertEqual(
+            CartCourse.objects.get(cart=cart, course=self.courses[0]).certificated_course_id, None)
+        self.assertEqual(cart.total, Decimal('100') + certificated_course.price)
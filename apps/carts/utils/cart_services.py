@@ -3,37 +3,96 @@
 # import secrets
 from decimal import Decimal
 
-from django.db.models import F
+from django.db import transaction
+from django.db.models import F, Exists, OuterRef
 from rest_framework.response import Response
 
 from ..models import Cart, CartCourse, Course
 from ...courses.models import CertificatedCourse
+from ...courses.utils.pricing import CertificatedCoursesPricing
 
 
-def get_invalid_course_id(obj_id: int, user) -> int:
-    """If the course is already paid by the user/Does not exist return them"""
-    try:
-        course = Course.objects.get(id=obj_id)
-    except Course.DoesNotExist:
-        return obj_id
+def get_unique_ids(ids) -> list:
+    """Ids as integers without the duplicates, in the given order"""
+    return list(dict.fromkeys(int(id_) for id_ in ids))
 
-    if CartCourse.objects.filter(cart__user=user, paid=True, course=course).exists():
-        return obj_id
+
+def get_invalid_course_ids(courses_id: list, user) -> list:
+    """Courses which do not exist or are already paid by the user, checked with one query"""
+    valid_ids, invalid_ids = [], []
+    for id_ in courses_id:
+        try:
+            valid_ids.append(int(id_))
+        except (TypeError, ValueError):
+            invalid_ids.append(id_)
+
+    paid_courses = CartCourse.objects.filter(cart__user=user, paid=True, course=OuterRef('pk'))
+    courses_paid = dict(Course.objects.filter(id__in=valid_ids).annotate(
+        is_paid=Exists(paid_courses)
+    ).values_list('id', 'is_paid'))
+    invalid_ids.extend(id_ for id_ in valid_ids if courses_paid.get(id_, True))
+    return invalid_ids
 
 
 class Queries:
 
     def data_is_valid(self, items, user):
-        invalid_id = False
-        for obj_id in items:
-            invalid_id = get_invalid_course_id(obj_id, user)
+        invalid_ids = get_invalid_course_ids(items, user)
 
-        if invalid_id:
-            return dict(is_valid=False, invalid_id=invalid_id, items=[])
+        if invalid_ids:
+            return dict(is_valid=False, invalid_id=invalid_ids[0], items=[])
         else:
             return dict(is_valid=True, invalid_id=0, items=items)
 
 
+def get_cart_course_ids(cart: Cart) -> tuple:
+    """:return (ids of all the cart courses, ids of the unpaid cart courses)"""
+    course_ids, unpaid_course_ids = set(), set()
+    rows = CartCourse.objects.filter(cart=cart).values_list('course_id', 'insert_type')
+    for course_id, insert_type in rows:
+        course_ids.add(course_id)
+        if insert_type == CartCourse.InsertType.UNPAID:
+            unpaid_course_ids.add(course_id)
+    return course_ids, unpaid_course_ids
+
+
+def get_courses_prices(courses_id: list) -> dict:
+    """:return {course id: price}, raises if a course does not exist"""
+    prices = dict(Course.objects.filter(id__in=courses_id).values_list('id', 'price'))
+    for id_ in courses_id:
+        if id_ not in prices:
+            raise Course.DoesNotExist(f'Course {id_} does not exist')
+    return prices
+
+
+def build_cart_courses(
+    courses_id: list,
+    prices: dict,
+    cart: Cart,
+    exclude_courses_id: set,
+    certificated_course: CertificatedCourse = None
+) -> tuple:
+    """New unpaid cart courses for the courses which are not in `exclude_courses_id`.
+    The added courses are put to `exclude_courses_id`, so the same course is added once
+
+    :return (cart courses to create, total price of them)
+    """
+    cart_courses = []
+    total = 0
+    for course_id in courses_id:
+        if course_id in exclude_courses_id:
+            continue
+        exclude_courses_id.add(course_id)
+        cart_courses.append(CartCourse(
+            insert_type=CartCourse.InsertType.UNPAID,
+            cart=cart,
+            course_id=course_id,
+            certificated_course=certificated_course
+        ))
+        total += prices[course_id]
+    return cart_courses, total
+
+
 def create_cart_courses(
     courses_id: list,
     cart: Cart,
@@ -43,36 +102,39 @@ def create_cart_courses(
     :param certificated_course: if the courses have a certificated course
     :return total price of the created cart courses
     """
-    total = 0
-    for course_id in courses_id:
-        course = Course.objects.get(id=course_id)
-        item, created = CartCourse.objects.get_or_create(
-            insert_type="UNPAID",
-            cart=cart,
-            course=course,
-            certificated_course=certificated_course,
-            defaults={'course': course}
-        )
-        if created:
-            total += course.price
+    courses_id = get_unique_ids(courses_id)
+    _, unpaid_course_ids = get_cart_course_ids(cart)
+    cart_courses, total = build_cart_courses(
+        courses_id, get_courses_prices(courses_id), cart, unpaid_course_ids, certificated_course)
+    CartCourse.objects.bulk_create(cart_courses)
     return total
 
 
-def create_cart_certificated_courses(certificated_courses_id: list, cart: Cart):
-    """:return total price of the all certificated courses"""
-    total = 0
+def build_cart_certificated_courses(certificated_courses_id: list, cart: Cart, cart_course_ids: set) -> tuple:
+    """Cart courses for the unpaid sub courses of the certificated courses, which are not in the cart yet.
+    A certificated course adds its price for the user if any of its sub courses is added
 
+    :return (cart courses to create, total price of the certificated courses)
+    """
+    certificated_courses = CertificatedCourse.objects.in_bulk(certificated_courses_id)
     for id_ in certificated_courses_id:
-        certificated_course = CertificatedCourse.objects.get(id=id_)
-        courses = certificated_course.get_unpaid_courses(
-            user=cart.user
-        )[0].exclude(cartcourse__cart__exact=cart.id).values_list('id', flat=True)
+        if id_ not in certificated_courses:
+            raise CertificatedCourse.DoesNotExist(f'Certificated course {id_} does not exist')
+    pricing = CertificatedCoursesPricing(certificated_courses.values(), cart.user)
 
-        courses_total = create_cart_courses(courses, cart, certificated_course)
+    cart_courses = []
+    total = 0
+    for id_ in certificated_courses_id:
+        certificated_course = certificated_courses[id_]
+        unpaid_courses_id, _ = pricing.get_unpaid_course_ids(certificated_course)
+        prices = {course_id: price for course_id, price, _ in pricing.sub_courses[id_]}
+        sub_cart_courses, courses_total = build_cart_courses(
+            unpaid_courses_id, prices, cart, cart_course_ids, certificated_course)
+        cart_courses.extend(sub_cart_courses)
         if courses_total:
-            total += certificated_course.get_price_for_user(cart.user)
+            total += pricing.get_price_for_user(certificated_course)
 
-    return total
+    return cart_courses, total
 
 
 def increase_cart_total(cart: Cart, total: float) -> None:
@@ -88,11 +150,25 @@ def add_cart_items(
     certificated_courses_id: list,
     cart: Cart
 ) -> None:
-    """Return total price for all added cart items"""
-    total = Decimal(0)
-    total += create_cart_courses(courses_id, cart)
-    total += create_cart_certificated_courses(certificated_courses_id, cart)
-    increase_cart_total(cart, total)
+    """Add the courses and the certificated courses sub courses to the cart with one insert
+    and update the cart price. The cart row is locked until the end of the transaction,
+    so the concurrent requests can't add the same courses twice
+    """
+    courses_id = get_unique_ids(courses_id)
+    certificated_courses_id = get_unique_ids(certificated_courses_id)
+
+    with transaction.atomic():
+        Cart.objects.select_for_update().filter(id=cart.id).values_list('id').first()
+        cart_course_ids, unpaid_course_ids = get_cart_course_ids(cart)
+
+        cart_courses, total = build_cart_courses(
+            courses_id, get_courses_prices(courses_id), cart, unpaid_course_ids)
+        cart_course_ids |= unpaid_course_ids
+        certificated_cart_courses, certificated_total = build_cart_certificated_courses(
+            certificated_courses_id, cart, cart_course_ids)
+
+        CartCourse.objects.bulk_create(cart_courses + certificated_cart_courses)
+        increase_cart_total(cart, Decimal(total) + Decimal(certificated_total))
 
 
 def remove_cart_course(cart_course: CartCourse) -> float:
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django import forms
+from django.utils.translation import gettext_lazy as _
 from .models import *
+from .utils.certificates.jobs import retry_job
+from .utils.certificates.rerender import queue_certificates_rerender
 from nested_admin.nested import NestedModelAdmin, NestedTabularInline
 from ckeditor_uploader.widgets import CKEditorUploadingWidget
 
@@ -42,7 +45,7 @@ class CourseAdmin(NestedModelAdmin):
 
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'course')
+    list_display = ('id', 'name', 'course', 'position')
     list_display_links = ('id', 'name')
     search_fields = ('name',)
 
@@ -54,7 +57,7 @@ class UploadFileAdmin(admin.ModelAdmin):
 
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
-    list_display = ('id', 'topic', 'name', 'course')
+    list_display = ('id', 'topic', 'name', 'course', 'position')
     list_display_links = ('id', 'name')
     search_fields = ('name', )
     list_filter = ('topic__course__name',)
@@ -78,10 +81,31 @@ class UserLessonAdmin(admin.ModelAdmin):
 
 @admin.register(CourseCertificate)
 class CourseCertificateAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'course', 'certificated_course')
+    list_display = ('id', 'user', 'course', 'certificated_course', 'status')
     list_display_links = ('id', 'user', 'course', 'certificated_course')
     search_fields = ('user', 'course', 'certificated_course')
-    list_filter = ('user', 'course', 'certificated_course')
+    list_filter = ('status', 'user', 'course', 'certificated_course')
+    actions = ('rerender',)
+
+    def rerender(self, request, queryset):
+        queued_count = queue_certificates_rerender(queryset)
+        self.message_user(request, _('%d certificates are queued to the certificates worker') % queued_count)
+    rerender.short_description = _('Regenerate the files of the selected certificates')
+
+
+@admin.register(CertificateJob)
+class CertificateJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'key', 'certificate', 'status', 'attempts', 'run_after', 'updated_at')
+    list_display_links = ('id', 'key')
+    search_fields = ('key',)
+    list_filter = ('status',)
+    readonly_fields = ('key', 'certificate', 'attempts', 'locked_at', 'last_error', 'created_at', 'updated_at')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        for job in queryset.exclude(status=CertificateJob.Status.DONE):
+            retry_job(job)
+    retry.short_description = _('Retry the selected jobs')
 
 
 @admin.register(CertificatedCourse)
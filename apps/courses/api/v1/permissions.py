@@ -1,22 +1,23 @@
 from rest_framework import permissions
 
+from ...utils.progress import get_course_progress
+
 
 class IsLessonCoursePaid(permissions.BasePermission):
     message = 'Course was not paid'
 
     def has_object_permission(self, request, view, lesson):
-        try:
-            lesson.previous_lesson.id
-        except IndexError:
+        progress = get_course_progress(request.user, lesson.course)
+        if progress.get_lesson_position(lesson.id) == 0:
             return True  # If the lesson is first, it's not blocked
-        return request.user.profile.is_course_paid(lesson.topic.course)
+        return progress.is_paid
 
 
 class IsUserLessonCoursePaid(permissions.BasePermission):
     message = 'Course was not paid'
 
     def has_object_permission(self, request, view, user_lesson):
-        return request.user.profile.is_course_paid(user_lesson.lesson.topic.course)
+        return get_course_progress(request.user, user_lesson.lesson.course).is_paid
 
 
 class IsAvailableForLesson(permissions.BasePermission):
@@ -1,6 +1,39 @@
 from rest_framework import serializers
 from ....quiz.api.v1.serializers import MyQuizListSerializer, QuizShortInfoSerializer
 from ...models import *
+from ...utils.pricing import CertificatedCoursesPricing
+from ...utils.progress import get_course_progress
+
+
+class DynamicFieldsMixin:
+    """Fields of the root serializer are selected by the request query params:
+    ?fields=id,name returns only the listed fields,
+    ?outline=material returns the short representation of a field, which has one
+    """
+
+    def get_query_param_list(self, param: str) -> list:
+        request = self.context.get('request')
+        if request is None:
+            return []
+        value = request.query_params.get(param, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def is_root_serializer(self) -> bool:
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def is_outlined(self, field_name: str) -> bool:
+        return field_name in self.get_query_param_list('outline')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested_fields = self.get_query_param_list('fields')
+        if requested_fields and self.is_root_serializer():
+            for field_name in set(fields) - set(requested_fields):
+                fields.pop(field_name)
+        return fields
 
 
 class SubCategorySerializer(serializers.ModelSerializer):
@@ -49,6 +82,28 @@ class LessonDetailSerializer(LessonListSerializer):
         fields = ('id', 'name', 'text', 'process_status', 'is_blocked')
 
 
+class LessonRetrieveSerializer(LessonDetailSerializer):
+    """Lesson detail with the neighbour lessons ids for the navigation"""
+    previous_lesson_id = serializers.SerializerMethodField()
+    next_lesson_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Lesson
+        fields = ('id', 'name', 'text', 'process_status', 'is_blocked', 'previous_lesson_id', 'next_lesson_id')
+
+    def get_previous_lesson_id(self, lesson):
+        try:
+            return lesson.previous_lesson.id
+        except IndexError:
+            return None
+
+    def get_next_lesson_id(self, lesson):
+        try:
+            return lesson.next_lesson.id
+        except IndexError:
+            return None
+
+
 class TopicListSerializer(serializers.ModelSerializer):
     topic_number = serializers.CharField(source='id', read_only=True)
     quiz = QuizShortInfoSerializer()
@@ -64,7 +119,7 @@ class TopicDetailSerializer(TopicListSerializer):
     quiz = MyQuizListSerializer()
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category = serializers.CharField(source='category.title', read_only=True)
     status = serializers.SerializerMethodField()
     finished_lessons_count = serializers.SerializerMethodField()
@@ -81,6 +136,9 @@ class CourseListSerializer(serializers.ModelSerializer):
         return course.get_status(self.context['request'].user)
 
     def get_finished_lessons_count(self, course):
+        if hasattr(course, 'user_finished_lessons_count'):
+            # Annotated by `CourseQuerySet.with_user_progress`
+            return course.user_finished_lessons_count
         try:
             return UserLesson.objects.filter(
                 user=self.context['request'].user,
@@ -116,10 +174,13 @@ class UserCourseListSerializer(serializers.ModelSerializer):
         return course
 
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Course with the full material. ?outline=material returns only the outline
+    of the material (ids, names, statuses), the lessons texts are paged by the course lessons endpoint
+    """
     category = serializers.CharField(source='category.title', read_only=True)
     last_update = serializers.DateTimeField(source='updated_at', format='%Y-%m-%d', read_only=True)
-    material = TopicDetailSerializer(source='topic_courses', many=True)
+    material = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
     paid = serializers.SerializerMethodField()
     final_quiz = MyQuizListSerializer()
@@ -153,10 +214,11 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         return course.get_status(self.context['request'].user)
 
     def get_paid(self, course):
-        try:
-            return self.context['request'].user.profile.is_course_paid(course)
-        except:
-            return False
+        return get_course_progress(self.context['request'].user, course).is_paid
+
+    def get_material(self, course):
+        serializer_class = TopicListSerializer if self.is_outlined('material') else TopicDetailSerializer
+        return serializer_class(course.topic_courses.all(), many=True, context=self.context).data
 
 
 class UserLessonSerializer(serializers.ModelSerializer):
@@ -166,14 +228,26 @@ class UserLessonSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'lesson']
 
 
-class CertificatedCourseSerializer(serializers.ModelSerializer):
+class CertificatedCourseListSerializer(serializers.ListSerializer):
+    """Prices and statuses of the whole page are computed at once"""
+
+    def to_representation(self, data):
+        certificated_courses = list(data.all() if hasattr(data, 'all') else data)
+        self.child.pricing = CertificatedCoursesPricing(certificated_courses, self.context['request'].user)
+        return super().to_representation(certificated_courses)
+
+
+class CertificatedCourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category = serializers.CharField(source='category.title', allow_null=True)
     status = serializers.SerializerMethodField()
     price = serializers.SerializerMethodField()
-    real_price = serializers.FloatField(source='sub_courses_price')
+    real_price = serializers.SerializerMethodField()
+    old_price = serializers.SerializerMethodField()
     sub_courses = CourseShortSerializer(many=True)
     sub_courses_count = serializers.ReadOnlyField()
 
+    pricing = None
+
     class Meta:
         model = CertificatedCourse
         fields = (
@@ -181,15 +255,27 @@ class CertificatedCourseSerializer(serializers.ModelSerializer):
             'real_price', 'old_price', 'status', 'lessons_count', 'quiz',
             'created_at', 'updated_at', 'sub_courses_count', 'sub_courses'
         )
+        list_serializer_class = CertificatedCourseListSerializer
+
+    def get_pricing(self, certificated_course) -> CertificatedCoursesPricing:
+        if self.pricing is None or certificated_course not in self.pricing.certificated_courses:
+            self.pricing = CertificatedCoursesPricing([certificated_course], self.context['request'].user)
+        return self.pricing
 
     def get_status(self, certificated_course):
-        return certificated_course.get_status(self.context['request'].user)
+        return self.get_pricing(certificated_course).get_status(certificated_course)
 
     def get_price(self, certificated_course):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return certificated_course.get_price_for_user(user)
-        return certificated_course.price
+        pricing = self.get_pricing(certificated_course)
+        if self.context['request'].user.is_authenticated:
+            return pricing.get_price_for_user(certificated_course)
+        return pricing.price(certificated_course)
+
+    def get_real_price(self, certificated_course):
+        return float(self.get_pricing(certificated_course).sub_courses_price(certificated_course))
+
+    def get_old_price(self, certificated_course):
+        return self.get_pricing(certificated_course).old_price(certificated_course)
 
 
 class CertificatedCourseSubCourseSerializer(serializers.ModelSerializer):
@@ -210,12 +296,16 @@ class CertificatedCourseSubCourseSerializer(serializers.ModelSerializer):
         return course.get_status(self.context['request'].user)
 
     def get_paid(self, course):
+        if hasattr(course, 'user_paid'):
+            return course.user_paid
         try:
             return self.context['request'].user.profile.is_course_paid(course)
         except:
             return False
 
     def get_finished_lessons_count(self, course):
+        if hasattr(course, 'user_finished_lessons_count'):
+            return course.user_finished_lessons_count
         try:
             return UserLesson.objects.filter(
                 user=self.context['request'].user,
@@ -1,9 +1,15 @@
-from django.db.models import Q
+from django.db.models import Prefetch
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from .permissions import IsAvailableForLesson, IsLessonCoursePaid, IsUserLessonCoursePaid
+from ...utils.categories import get_category_tree
+from ...utils.progress import reset_course_progress
+from ...utils.certificates.verification import CERTIFICATE_VERIFY_MAX_AGE, get_certificate_verification
+from ...utils.response_cache import CachedResponseMixin
+from ...utils.search import ObjectType, filter_by_search
+from ...utils.views_counter import course_views_counter
 from ...models import Course, Topic, Lesson, Category, UserCourse, UserLesson, CertificatedCourse, CourseCertificate
 from ....quiz.api.v1.serializers import CourseCertificateSerializer
 from ....core.utils.apiviews import PaginationListAPIView, \
@@ -15,29 +21,33 @@ from .serializers import (
     TopicSerializer,
     LessonListSerializer,
     LessonDetailSerializer,
+    LessonRetrieveSerializer,
     CategorySerializer,
     TopicDetailSerializer,
     CourseDetailSerializer, UserLessonSerializer, CertificatedCourseSerializer, CertificatedCourseSubCourseSerializer,
 )
 
 
-class CategoryListView(PaginationListAPIView):
+class CategoryListView(CachedResponseMixin, PaginationListAPIView):
     # http://127.0.0.1:2000/api/courses/v1/category-list/?id=1
     serializer_class = CategorySerializer
     list_codes = {'success': 500, 'error': 501}
+    cache_models = ('courses.Category',)
+    cache_anonymous_only = False
 
     def get_queryset(self):
         """
             Query params:
             ?id (int): id of parent category
         """
-        queryset = Category.objects.filter(parent_category=None, is_active=True)
+        queryset = get_category_tree()
         category_id = self.request.query_params.get('id')
         if category_id is not None:
             try:
-                queryset = queryset.filter(id=int(category_id))
+                category_id = int(category_id)
             except ValueError:
                 return []
+            queryset = [category for category in queryset if category.id == category_id]
         return queryset
 
 
@@ -51,45 +61,68 @@ class CourseListView(PaginationListAPIView):
             Query params:
             ?cat_id (int): courses category id
         """
-        queryset = Course.objects.filter(is_active=True)
+        queryset = Course.objects.filter(is_active=True).select_related('category').with_user_progress(
+            self.request.user)
         category_id = self.request.query_params.get('cat_id')
         if category_id is not None:
             try:
-                category_ids = []
-                qs_category = Category.objects.filter(id=category_id)
-                for item in qs_category:
-                    category_ids.append(item.pk)
-                    children = item.children.all()
-                    for child in children:
-                        category_ids.append(child.pk)
-                queryset = queryset.filter(category__in=category_ids)
+                tree_path = Category.get_descendants_tree_path(int(category_id))
             except ValueError:
                 return []
+            if not tree_path:
+                return queryset.none()
+            queryset = queryset.filter(category__tree_path__startswith=tree_path)
         return queryset
 
 
-class CourseRetrieveView(CustomRetrieveAPIView):
+class CourseRetrieveView(CachedResponseMixin, CustomRetrieveAPIView):
     # http://127.0.0.1:2000/api/courses/v1/course-detail/{id}
     serializer_class = CourseDetailSerializer
     retrieve_codes = {'success': 510, 'error': 511}
+    cache_models = ('courses.Course', 'courses.Category', 'courses.Topic', 'courses.Lesson', 'quiz.Quiz')
 
     def get_queryset(self):
-        return Course.objects.filter(is_active=True)
+        lessons = Lesson.objects.order_by('position')
+        if 'material' in self.request.query_params.get('outline', '').split(','):
+            lessons = lessons.defer('description')
+        topics = Topic.objects.order_by('position').select_related('quiz').prefetch_related(
+            Prefetch('lessons', queryset=lessons))
+        return Course.objects.filter(is_active=True).select_related('category').prefetch_related(
+            Prefetch('topic_courses', queryset=topics))
+
+    def get_object(self):
+        course = super().get_object()
+        course_views_counter.add(course.pk)
+        return course
+
+    def on_cache_hit(self, request, *args, **kwargs):
+        course_views_counter.add(kwargs['pk'])
+
+
+class CourseLessonsContentView(PaginationListAPIView):
+    # http://127.0.0.1:2000/api/courses/v1/course-detail/{id}/lessons/?page=2
+    """Paginated lessons texts of the course, in the course order"""
+    serializer_class = LessonDetailSerializer
+    list_codes = {'success': 560, 'error': 561}
+
+    def get_queryset(self):
+        return Lesson.objects.filter(
+            topic__course_id=self.kwargs['pk'], topic__course__is_active=True
+        ).select_related('topic__course').order_by('position')
 
 
-class TopicListView(PaginationListAPIView):
+class TopicListView(CachedResponseMixin, PaginationListAPIView):
     # http://127.0.0.1:2000/api/courses/v1/topic-list/?q=OOP
     serializer_class = TopicSerializer
     list_codes = {'success': 515, 'error': 516}
+    cache_models = ('courses.Topic', 'courses.Course')
+    cache_anonymous_only = False
 
     def get_queryset(self, *args, **kwargs):
         queryset = Topic.objects.all()
         query = self.request.GET.get("q", None)
         if query:
-            try:
-                return queryset.filter(Q(name__icontains=query) | Q(course__name__icontains=query)).distinct()
-            except ValueError:
-                return []
+            return filter_by_search(queryset, ObjectType.TOPIC, query)
         return queryset
 
 
@@ -112,21 +145,18 @@ class LessonListView(PaginationListAPIView):
         queryset = Lesson.objects.all()
         query = self.request.GET.get("q", None)
         if query:
-            try:
-                return queryset.filter(Q(name__icontains=query) | Q(topic__name__icontains=query)).distinct()
-            except ValueError:
-                return []
+            return filter_by_search(queryset, ObjectType.LESSON, query)
         return queryset
 
 
 class LessonRetrieveView(CustomRetrieveAPIView):
     # http://127.0.0.1:2000/api/courses/v1/lesson-detail/{id}/
-    serializer_class = LessonDetailSerializer
+    serializer_class = LessonRetrieveSerializer
     permission_classes = (IsLessonCoursePaid, IsAvailableForLesson,)
     retrieve_codes = {'success': 530, 'error': 531}
 
     def get_queryset(self):
-        return Lesson.objects.all()
+        return Lesson.objects.select_related('topic')
 
 
 class UserLessonAPI(CustomPartialUpdateAPIView):
@@ -147,6 +177,11 @@ class UserLessonAPI(CustomPartialUpdateAPIView):
         )
         return user_lesson
 
+    def patch(self, request, *args, **kwargs):
+        response = super().patch(request, *args, **kwargs)
+        reset_course_progress(request.user)
+        return response
+
 
 class CourseCertificateListView(PaginationListAPIView):
     serializer_class = CourseCertificateSerializer
@@ -157,30 +192,51 @@ class CourseCertificateListView(PaginationListAPIView):
         return self.request.user.certificates.all()
 
 
+class CourseCertificateRetrieveView(CustomRetrieveAPIView):
+    """User certificate. Clients poll it until the status is ready"""
+    serializer_class = CourseCertificateSerializer
+    permission_classes = (IsAuthenticated,)
+    retrieve_codes = {'success': 565, 'error': 566}
+
+    def get_queryset(self):
+        return self.request.user.certificates.all()
+
+
 class CourseCertificateVerifyView(RetrieveAPIView):
     """API for verifying certificates by hash.
-    If there's a certificate with the given hash - successfully verified
+    If there's a certificate with the given hash - successfully verified.
+    Certificates don't change after they are generated, so the responses are cached
+    by the clients with the ETag of the certificate files
     """
     queryset = CourseCertificate.objects.all()
     lookup_field = 'hash'
 
     def retrieve(self, request, *args, **kwargs):
-        certificate_qs = self.queryset.filter(hash=kwargs['hash'])
-        if certificate_qs:
-            certificate_pdf = certificate_qs.last().pdf.url
-            return Response(
+        verification = get_certificate_verification(kwargs['hash'])
+        if verification is None:
+            return Response(status=400, data={'success': False, 'code': 556})
+
+        etag = f'"{verification["etag"]}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=304)
+        else:
+            response = Response(
                 status=200,
-                data={'success': True, 'certificate_pdf': certificate_pdf, 'code': 555}
+                data={'success': True, 'certificate_pdf': verification['certificate_pdf'], 'code': 555}
             )
-        return Response(status=400, data={'success': False, 'code': 556})
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={CERTIFICATE_VERIFY_MAX_AGE}'
+        return response
 
 
-class CertificatedCourseListView(PaginationListAPIView, ViewSerializerRequestContext):
+class CertificatedCourseListView(CachedResponseMixin, PaginationListAPIView, ViewSerializerRequestContext):
     serializer_class = CertificatedCourseSerializer
     list_codes = {'success': 545, 'error': 546}
+    cache_models = (
+        'courses.CertificatedCourse', 'courses.Course', 'courses.Category', 'courses.Lesson', 'quiz.Quiz')
 
     def get_queryset(self):
-        return CertificatedCourse.objects.all()
+        return CertificatedCourse.objects.select_related('category').prefetch_related('sub_courses')
 
 
 class CertificatedCourseDetailView(CustomRetrieveAPIView, ViewSerializerRequestContext):
@@ -189,7 +245,7 @@ class CertificatedCourseDetailView(CustomRetrieveAPIView, ViewSerializerRequestC
     retrieve_codes = {'success': 550, 'error': 551}
 
     def get_queryset(self):
-        return CertificatedCourse.objects.all()
+        return CertificatedCourse.objects.select_related('category').prefetch_related('sub_courses')
 
 
 class CertificatedCourseDetailCoursesView(PaginationListAPIView):
@@ -198,4 +254,5 @@ class CertificatedCourseDetailCoursesView(PaginationListAPIView):
     list_codes = {'success': 555, 'error': 556}
 
     def get_queryset(self, *args, **kwargs):
-        return CertificatedCourse.objects.get(id=self.kwargs['pk']).sub_courses.all()
+        return CertificatedCourse.objects.get(id=self.kwargs['pk']).sub_courses.select_related(
+            'category').with_user_progress(self.request.user)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...utils.certificates.certificates import (
+    create_bytes_certificate_qrcode, create_certificate_pdf, get_certificate_html, get_qr_data
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure the certificates rendering throughput: QR codes, filled html and PDF files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=50)
+        parser.add_argument('--skip-pdf', action='store_true', help='Measure without wkhtmltopdf')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        award_date = timezone.now()
+        qr_images = []
+
+        started = time.perf_counter()
+        for index in range(count):
+            qr_images.append(create_bytes_certificate_qrcode(get_qr_data(f'{index:032x}', 'aristotle.uz')).getvalue())
+        self.report('qr codes', count, started)
+
+        started = time.perf_counter()
+        for index, qr_image in enumerate(qr_images):
+            get_certificate_html(f'Student {index}', qr_image, award_date, 'Benchmark course')
+        self.report('html', count, started)
+
+        if not options['skip_pdf']:
+            started = time.perf_counter()
+            for index, qr_image in enumerate(qr_images):
+                create_certificate_pdf(f'Student {index}', qr_image, award_date, 'Benchmark course')
+            self.report('pdf', count, started)
+
+    def report(self, name: str, count: int, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{name}: {count / elapsed:.1f} certificates/sec ({elapsed * 1000 / count:.2f} ms each)')
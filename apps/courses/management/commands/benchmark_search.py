@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from ...models import Course, Topic, Lesson
+from ...utils.search import ObjectType, filter_by_search, index_objects
+
+WORDS = (
+    'python', 'django', 'algebra', 'geometry', 'history', 'physics', 'chemistry', 'biology', 'english',
+    'grammar', 'function', 'variable', 'class', 'object', 'inheritance', 'database', 'network', 'design',
+    'economics', 'marketing', 'finance', 'statistics', 'probability', 'matrix', 'vector', 'integral',
+)
+QUERIES = ('python', 'object inheritance', 'data', 'matr', 'finance statistics')
+
+
+class Command(BaseCommand):
+    help = 'Compare the indexed lessons search with the icontains search on generated data. ' \
+           'The generated data is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=100000)
+        parser.add_argument('--lessons-per-topic', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.generate(options['lessons'], options['lessons_per_topic'])
+            for query in QUERIES:
+                icontains_time, icontains_count = self.measure(options['repeat'], lambda: Lesson.objects.filter(
+                    Q(name__icontains=query) | Q(topic__name__icontains=query)).distinct())
+                search_time, search_count = self.measure(options['repeat'], lambda: filter_by_search(
+                    Lesson.objects.all(), ObjectType.LESSON, query))
+                self.stdout.write(
+                    f'"{query}": icontains {icontains_time:.1f} ms ({icontains_count} found), '
+                    f'search {search_time:.1f} ms ({search_count} found)'
+                )
+            transaction.set_rollback(True)
+
+    def generate(self, lessons_count: int, lessons_per_topic: int):
+        started = time.perf_counter()
+        course = Course.objects.create(name='Search benchmark', author='benchmark', description='', image='')
+        Topic.objects.bulk_create([
+            Topic(course=course, name=self.get_title())
+            for _ in range(max(lessons_count // lessons_per_topic, 1))
+        ])
+        topics = list(Topic.objects.filter(course=course))
+        lessons = [
+            Lesson(topic=topics[index % len(topics)], name=self.get_title(), description='', position=index)
+            for index in range(lessons_count)
+        ]
+        Lesson.objects.bulk_create(lessons, batch_size=5000)
+        index_objects(ObjectType.LESSON, Lesson.objects.filter(topic__course=course))
+        self.stdout.write(f'Generated {lessons_count} lessons in {time.perf_counter() - started:.1f} s')
+
+    @staticmethod
+    def get_title() -> str:
+        return ' '.join(random.sample(WORDS, 3))
+
+    @staticmethod
+    def measure(repeat: int, get_queryset) -> tuple:
+        """:return (average time in ms, found objects count)"""
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(get_queryset()[:20])
+        elapsed = time.perf_counter() - started
+        return elapsed * 1000 / repeat, get_queryset().count()
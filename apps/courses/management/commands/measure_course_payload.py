@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ...api.v1.serializers import CourseDetailSerializer
+from ...api.v1.views import CourseRetrieveView
+from ....accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare the course detail payload size and serialization time of the outline and the full material'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('--user', type=int, help='Id of the user to render the statuses for')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        user = User.objects.get(id=options['user']) if options['user'] else AnonymousUser()
+        for query_string in ('outline=material', ''):
+            size, elapsed = self.measure(options['course_id'], user, query_string, options['repeat'])
+            mode = 'outline' if query_string else 'full'
+            self.stdout.write(f'{mode}: {size / 1024:.1f} KB, {elapsed:.1f} ms')
+
+    @staticmethod
+    def measure(course_id: int, user, query_string: str, repeat: int) -> tuple:
+        """:return (payload size in bytes, average serialization time in ms)"""
+        request = Request(APIRequestFactory().get(f'/?{query_string}'))
+        request.user = user
+        view = CourseRetrieveView(request=request, kwargs={'pk': course_id}, format_kwarg=None)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            user.__dict__.pop('_course_progress', None)
+            course = view.get_queryset().get(pk=course_id)
+            payload = JSONRenderer().render(CourseDetailSerializer(course, context={'request': request}).data)
+        return len(payload), (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,17 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Category, rebuild_category_tree, CATEGORY_TREE_CACHE_KEY
+from ...utils.response_cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized paths of all categories and drop the cached tree'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated_count = rebuild_category_tree()
+        cache.delete(CATEGORY_TREE_CACHE_KEY)
+        bump_model_version(Category)
+        self.stdout.write(self.style.SUCCESS(f'Category tree rebuilt: {updated_count} categories updated'))
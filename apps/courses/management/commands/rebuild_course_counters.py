@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Course, CertificatedCourse, update_courses_counters, update_certificated_courses_counters
+from ...utils.response_cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = 'Recount the stored lessons/topics counters of all courses and certificated courses'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            update_courses_counters(Course.objects.all())
+            update_certificated_courses_counters(CertificatedCourse.objects.all())
+        bump_model_version(Course)
+        bump_model_version(CertificatedCourse)
+        self.stdout.write(self.style.SUCCESS(
+            f'Counters rebuilt: {Course.objects.count()} courses, '
+            f'{CertificatedCourse.objects.count()} certificated courses'
+        ))
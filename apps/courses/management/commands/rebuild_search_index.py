@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import SearchTerm
+from ...utils.search import INDEXED_MODELS, index_objects
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index of topics, lessons and quizzes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        for object_type, (model, *_) in INDEXED_MODELS.items():
+            with transaction.atomic():
+                SearchTerm.objects.filter(object_type=object_type).delete()
+                object_ids = list(model.objects.order_by('id').values_list('id', flat=True))
+                for start in range(0, len(object_ids), chunk_size):
+                    chunk = object_ids[start:start + chunk_size]
+                    index_objects(object_type, model.objects.filter(id__in=chunk))
+            self.stdout.write(f'{object_type}: {len(object_ids)} indexed')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
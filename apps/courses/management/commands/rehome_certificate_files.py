@@ -0,0 +1,65 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from ...models import CourseCertificate
+from ...utils.certificates.storage import get_content_name, is_content_addressed, save_content_addressed
+from ...utils.certificates.verification import invalidate_certificate_verification
+
+
+class Command(BaseCommand):
+    help = 'Move the certificates QR codes and PDFs to the content addressed names. ' \
+           'Moved files are skipped, so the command may be started again after an interruption'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--delete-old', action='store_true', help='Delete the files from the old names')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        moved_count = missing_count = 0
+        last_id = 0
+        while True:
+            certificates = list(CourseCertificate.objects.filter(id__gt=last_id).order_by('id').only(
+                'id', 'hash', 'qr', 'pdf')[:options['chunk_size']])
+            if not certificates:
+                break
+            last_id = certificates[-1].id
+
+            for certificate in certificates:
+                changed_fields = {}
+                for field_name in ('qr', 'pdf'):
+                    field_file = getattr(certificate, field_name)
+                    old_name = field_file.name
+                    if not old_name or is_content_addressed(old_name):
+                        continue
+                    if not field_file.storage.exists(old_name):
+                        missing_count += 1
+                        self.stderr.write(f'Certificate {certificate.id}: {old_name} is missing')
+                        continue
+
+                    with field_file.storage.open(old_name, 'rb') as old_file:
+                        content = old_file.read()
+                    extension = os.path.splitext(old_name)[1].lower()
+                    if options['dry_run']:
+                        new_name = get_content_name(field_file.field, content, extension)
+                    else:
+                        new_name = save_content_addressed(field_file, content, extension)
+                    changed_fields[field_name] = (old_name, new_name)
+
+                if not changed_fields:
+                    continue
+                moved_count += len(changed_fields)
+                for field_name, (old_name, new_name) in changed_fields.items():
+                    self.stdout.write(f'Certificate {certificate.id}: {old_name} -> {new_name}')
+                if options['dry_run']:
+                    continue
+
+                CourseCertificate.objects.filter(id=certificate.id).update(
+                    **{field_name: new_name for field_name, (_, new_name) in changed_fields.items()})
+                invalidate_certificate_verification(certificate.hash)
+                if options['delete_old']:
+                    for field_name, (old_name, _) in changed_fields.items():
+                        getattr(certificate, field_name).storage.delete(old_name)
+
+        self.stdout.write(self.style.SUCCESS(f'Moved files: {moved_count}, missing files: {missing_count}'))
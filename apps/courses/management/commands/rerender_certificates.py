@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from ...models import CourseCertificate
+from ...utils.certificates.jobs import CERTIFICATE_DOMAIN
+from ...utils.certificates.rerender import rerender_certificates
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the PDF and QR files of the certificates with a process pool, ' \
+           'e.g. after the design was changed. Up to date certificates are skipped, ' \
+           'so an interrupted run continues when it is started again'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, action='append', dest='ids', help='Certificate id, may be repeated')
+        parser.add_argument('--user', type=int, help='User id')
+        parser.add_argument('--course', type=int, help='Course id')
+        parser.add_argument('--certificated-course', type=int, help='Certificated course id')
+        parser.add_argument('--status', choices=CourseCertificate.Status.values)
+        parser.add_argument('--domain', default=CERTIFICATE_DOMAIN, help='Domain of the QR code links')
+        parser.add_argument('--processes', type=int, default=None, help='CPU count by default')
+        parser.add_argument('--force', action='store_true', help='Regenerate the up to date certificates too')
+
+    def handle(self, *args, **options):
+        certificates = CourseCertificate.objects.all()
+        if options['ids']:
+            certificates = certificates.filter(id__in=options['ids'])
+        if options['user']:
+            certificates = certificates.filter(user_id=options['user'])
+        if options['course']:
+            certificates = certificates.filter(course_id=options['course'])
+        if options['certificated_course']:
+            certificates = certificates.filter(certificated_course_id=options['certificated_course'])
+        if options['status']:
+            certificates = certificates.filter(status=options['status'])
+
+        total = certificates.count()
+        counts = {'rendered': 0, 'skipped': 0, 'failed': 0}
+        results = rerender_certificates(certificates, options['domain'], options['processes'], options['force'])
+        for index, result in enumerate(results, 1):
+            counts[result.status] += 1
+            line = f'[{index}/{total}] certificate {result.certificate_id}: {result.status}'
+            if result.error:
+                line = f'{line} {result.error}'
+            self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered: {counts["rendered"]}, skipped: {counts["skipped"]}, failed: {counts["failed"]}'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ...api.v1.views import CategoryListView, CertificatedCourseListView, CourseRetrieveView, TopicListView
+from ...utils.response_cache import get_response_cache_stats
+
+CACHED_VIEWS = (CategoryListView, CertificatedCourseListView, CourseRetrieveView, TopicListView)
+
+
+class Command(BaseCommand):
+    help = 'Show hits/misses of the cached catalog endpoints'
+
+    def handle(self, *args, **options):
+        stats = get_response_cache_stats([view.get_cache_name() for view in CACHED_VIEWS])
+        for view_name, counters in stats.items():
+            requests_count = counters['hits'] + counters['misses']
+            hit_rate = counters['hits'] / requests_count * 100 if requests_count else 0
+            self.stdout.write(
+                f"{view_name}: hits={counters['hits']} misses={counters['misses']} hit rate={hit_rate:.1f}%"
+            )
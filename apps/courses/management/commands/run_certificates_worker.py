@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...utils.certificates.jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Generate the files of the queued certificates. Several workers may run at once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the due jobs and exit')
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--sleep', type=float, default=2, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            done_count, failed_count = process_jobs(options['batch_size'])
+            if done_count or failed_count:
+                self.stdout.write(f'Certificates generated: {done_count}, failed attempts: {failed_count}')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,32 @@
+from django.apps import apps
+from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+class CourseQuerySet(models.query.QuerySet):
+    def with_user_progress(self, user):
+        """Annotate the user specific fields for the whole queryset:
+        `user_has_certificate`, `user_paid` and `user_finished_lessons_count`
+        """
+        if user is None or not user.is_authenticated:
+            return self.annotate(
+                user_has_certificate=Value(False, output_field=models.BooleanField()),
+                user_paid=Value(False, output_field=models.BooleanField()),
+                user_finished_lessons_count=Value(0, output_field=models.IntegerField()),
+            )
+
+        from .models import Status
+        CourseCertificate = apps.get_model('courses', 'CourseCertificate')
+        UserLesson = apps.get_model('courses', 'UserLesson')
+        CartCourse = apps.get_model('carts', 'CartCourse')
+
+        finished_lessons = UserLesson.objects.filter(
+            user=user, lesson__topic__course=OuterRef('pk'), status=Status.FINISHED
+        ).order_by().values('lesson__topic__course').annotate(count=Count('id')).values('count')
+
+        return self.annotate(
+            user_has_certificate=Exists(CourseCertificate.objects.filter(user=user, course=OuterRef('pk'))),
+            user_paid=Exists(CartCourse.objects.filter(cart__user=user, course=OuterRef('pk'), paid=True)),
+            user_finished_lessons_count=Coalesce(Subquery(finished_lessons), 0),
+        )
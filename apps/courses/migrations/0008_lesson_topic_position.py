@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+def fill_positions(apps, schema_editor):
+    Topic = apps.get_model('courses', 'Topic')
+    Lesson = apps.get_model('courses', 'Lesson')
+
+    course_ids = Topic.objects.values_list('course_id', flat=True).distinct()
+    for course_id in course_ids:
+        topics = list(Topic.objects.filter(course_id=course_id).order_by('id'))
+        for position, topic in enumerate(topics):
+            topic.position = position
+        Topic.objects.bulk_update(topics, ['position'])
+
+        lessons = list(Lesson.objects.filter(topic__course_id=course_id).order_by('topic_id', 'id'))
+        for position, lesson in enumerate(lessons):
+            lesson.position = position
+        Lesson.objects.bulk_update(lessons, ['position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_auto_20210825_0914'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='position',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Position in the course'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='position',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Position in the course'),
+        ),
+        migrations.RunPython(fill_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CertificatedCourse = apps.get_model('courses', 'CertificatedCourse')
+    Topic = apps.get_model('courses', 'Topic')
+    Lesson = apps.get_model('courses', 'Lesson')
+
+    topics = Topic.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    lessons = Lesson.objects.filter(topic__course=OuterRef('pk')).order_by().values('topic__course')
+    Course.objects.update(
+        topics_count=Coalesce(Subquery(topics.annotate(count=Count('id')).values('count')), 0),
+        lessons_count=Coalesce(Subquery(lessons.annotate(count=Count('id')).values('count')), 0),
+    )
+
+    sub_courses = Course.objects.filter(certificated_courses=OuterRef('pk')).order_by().values('certificated_courses')
+    CertificatedCourse.objects.update(
+        sub_courses_count=Coalesce(Subquery(sub_courses.annotate(count=Count('id')).values('count')), 0),
+        lessons_count=Coalesce(Subquery(sub_courses.annotate(total=Sum('lessons_count')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_lesson_topic_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lessons count'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='topics_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Topics count'),
+        ),
+        migrations.AddField(
+            model_name='certificatedcourse',
+            name='lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lessons count'),
+        ),
+        migrations.AddField(
+            model_name='certificatedcourse',
+            name='sub_courses_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sub courses count'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+def fill_tree_paths(apps, schema_editor):
+    Category = apps.get_model('courses', 'Category')
+
+    categories = {category.id: category for category in Category.objects.all()}
+    tree_paths = {}
+    for category_id in categories:
+        chain = []
+        current_id = category_id
+        while current_id in categories and current_id not in tree_paths and current_id not in chain:
+            chain.append(current_id)
+            current_id = categories[current_id].parent_category_id
+
+        tree_path = tree_paths.get(current_id, '/')
+        for chain_id in reversed(chain):
+            tree_path = f'{tree_path}{chain_id}/'
+            tree_paths[chain_id] = tree_path
+
+    for category_id, tree_path in tree_paths.items():
+        categories[category_id].tree_path = tree_path
+    Category.objects.bulk_update(categories.values(), ['tree_path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_course_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='tree_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Materialized ids path from the root category, e.g. /1/4/9/', max_length=255),
+        ),
+        migrations.RunPython(fill_tree_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+
+from apps.courses.utils.search import get_terms_weights
+
+# {object type: (app label, model name, title field, parent title field)}
+INDEXED_MODELS = {
+    'topic': ('courses', 'Topic', 'name', 'course__name'),
+    'lesson': ('courses', 'Lesson', 'name', 'topic__name'),
+    'quiz': ('quiz', 'Quiz', 'title', 'topic__name'),
+}
+
+
+def build_search_index(apps, schema_editor):
+    """Index the existing topics, lessons and quizzes, as the rebuild_search_index command does"""
+    SearchTerm = apps.get_model('courses', 'SearchTerm')
+    for object_type, (app_label, model_name, title_field, parent_title_field) in INDEXED_MODELS.items():
+        model = apps.get_model(app_label, model_name)
+        search_terms = []
+        rows = model.objects.order_by('id').values_list('id', title_field, parent_title_field)
+        for object_id, title, parent_title in rows.iterator():
+            search_terms += [
+                SearchTerm(term=term, object_type=object_type, object_id=object_id, weight=weight)
+                for term, weight in get_terms_weights(title, parent_title).items()
+            ]
+            if len(search_terms) >= 1000:
+                SearchTerm.objects.bulk_create(search_terms)
+                search_terms = []
+        SearchTerm.objects.bulk_create(search_terms)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_category_tree_path'),
+        ('quiz', '0006_quiz_certificated_course'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Term')),
+                ('object_type', models.CharField(choices=[('topic', 'Topic'), ('lesson', 'Lesson'), ('quiz', 'Quiz')], max_length=10, verbose_name='Object type')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Object id')),
+                ('weight', models.SmallIntegerField(default=1, verbose_name='Weight')),
+            ],
+            options={
+                'verbose_name': 'Search term',
+                'verbose_name_plural': 'Search terms',
+                'index_together': {('object_type', 'term'), ('object_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
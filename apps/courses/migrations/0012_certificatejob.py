@@ -0,0 +1,46 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_searchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursecertificate',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', help_text='The files are generated by the certificates worker', max_length=20, verbose_name='Status'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='coursecertificate',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', help_text='The files are generated by the certificates worker', max_length=20, verbose_name='Status'),
+        ),
+        migrations.CreateModel(
+            name='CertificateJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='User and the (certificated) course', max_length=100, unique=True, verbose_name='Idempotency key')),
+                ('domain', models.CharField(max_length=255, verbose_name='Domain for the QR code link')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Run after')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Locked at')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('certificate', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='job', to='courses.CourseCertificate')),
+            ],
+            options={
+                'verbose_name': 'Certificate job',
+                'verbose_name_plural': 'Certificates jobs',
+                'ordering': ['id'],
+                'index_together': {('status', 'run_after')},
+            },
+        ),
+    ]
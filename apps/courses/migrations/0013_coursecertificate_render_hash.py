@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_certificatejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursecertificate',
+            name='render_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the template and the data of the generated files', max_length=64, verbose_name='Render hash'),
+        ),
+    ]
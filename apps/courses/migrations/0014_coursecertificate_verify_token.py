@@ -0,0 +1,37 @@
+import secrets
+
+from django.db import migrations, models
+
+import apps.courses.models
+
+
+def backfill_verify_tokens(apps, schema_editor):
+    """Give random tokens to the certificates without a hash and to the duplicates of a hash.
+    The first certificate of a duplicated hash keeps it, so the printed QR codes stay valid
+    """
+    CourseCertificate = apps.get_model('courses', 'CourseCertificate')
+    seen_hashes = set()
+    certificates_to_update = []
+    for certificate in CourseCertificate.objects.order_by('id').only('id', 'hash').iterator():
+        if certificate.hash and certificate.hash not in seen_hashes:
+            seen_hashes.add(certificate.hash)
+            continue
+        certificate.hash = secrets.token_urlsafe(32)
+        certificates_to_update.append(certificate)
+    CourseCertificate.objects.bulk_update(certificates_to_update, ['hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_coursecertificate_render_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_verify_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='coursecertificate',
+            name='hash',
+            field=models.CharField(default=apps.courses.models.generate_verify_token, max_length=150, unique=True, verbose_name='Hash for verify'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_coursecertificate_verify_token'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='searchterm',
+            index_together={('object_type', 'object_id')},
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['object_type', 'term'], name='courses_searchterm_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+    ]
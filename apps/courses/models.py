@@ -1,16 +1,23 @@
+import secrets
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
 from slugify import slugify
-from django.db.models import F
+from django.db.models import Count, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from ckeditor.fields import RichTextField
 from ckeditor_uploader.fields import RichTextUploadingField
 
 from ..accounts.models import User
 from ..core.models import TimestampedModel
+from .managers import CourseQuerySet
+from .utils.response_cache import bump_model_version
 
 
 class Status(models.TextChoices):
@@ -25,6 +32,9 @@ class Category(TimestampedModel):
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, blank=True, unique=True)
     path = models.TextField(null=True, blank=True)
+    tree_path = models.CharField(
+        max_length=255, blank=True, db_index=True, editable=False,
+        help_text='Materialized ids path from the root category, e.g. /1/4/9/')
     is_active = models.BooleanField(default=True)
     image = models.ImageField(upload_to='images/category', null=True, blank=True)
     sort = models.CharField(max_length=10, blank=True)
@@ -48,6 +58,17 @@ class Category(TimestampedModel):
     def image_url(self):
         return f"{self.image.url}" if self.image else None
 
+    @classmethod
+    def get_descendants_tree_path(cls, category_id) -> str:
+        """Tree path of the category. All the descendants tree paths start with it"""
+        return cls.objects.filter(id=category_id).values_list('tree_path', flat=True).first()
+
+    def get_descendants(self, include_self: bool = True):
+        descendants = Category.objects.filter(tree_path__startswith=self.tree_path)
+        if not include_self:
+            descendants = descendants.exclude(id=self.id)
+        return descendants
+
 
 class CourseBase(TimestampedModel):
     name = models.CharField(max_length=100, verbose_name=_('Course name'))
@@ -68,6 +89,8 @@ class Course(CourseBase):
     old_price = models.DecimalField(default=0.00, max_digits=10, decimal_places=1)
     price = models.DecimalField(default=0.00, max_digits=10, decimal_places=1)
     views = models.PositiveIntegerField(default=0)
+    lessons_count = models.PositiveIntegerField(_('Lessons count'), default=0, editable=False)
+    topics_count = models.PositiveIntegerField(_('Topics count'), default=0, editable=False)
     person_count = models.PositiveIntegerField(default=0)
     permission = models.BooleanField(default=True)
     certificate = models.BooleanField(default=True)
@@ -77,6 +100,8 @@ class Course(CourseBase):
         default=0
     )
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Course')
         verbose_name_plural = _('     Courses')
@@ -86,19 +111,15 @@ class Course(CourseBase):
         return self.name
 
     def is_completed(self, user: User):
-        last_course_topic = self.topic_courses.last()
-        if last_course_topic.quiz:
-            return user.quiz_takers.filter(quiz=last_course_topic.quiz, completed=True).exists()
-        return user.lessons.filter(lesson=last_course_topic.lessons.last(), status=Status.FINISHED)
+        from .utils.progress import get_course_progress
+        return get_course_progress(user, self).is_completed()
 
     @property
     def viewed_count(self):
-        Course.objects.filter(pk=self.pk).update(views=F('views') + 1)
-        return self.views + 1
+        """Stored views with the views which are buffered, but not written yet"""
+        from .utils.views_counter import course_views_counter
+        return self.views + course_views_counter.get_pending(self.pk)
 
-    @property
-    def lessons_count(self):
-        return sum([topic.lessons.count() for topic in self.topic_courses.prefetch_related('lessons')])
 
     @property
     def topics_list(self):
@@ -106,12 +127,14 @@ class Course(CourseBase):
 
     @property
     def lessons_list(self):
-        lessons = []
-        for topic in self.topic_courses.prefetch_related('lessons'):
-            lessons += [lesson for lesson in topic.lessons.all()]
-        return lessons
+        return list(Lesson.objects.filter(topic__course=self).order_by('position'))
 
     def get_status(self, user: User):
+        if hasattr(self, 'user_has_certificate'):
+            # Annotated by `CourseQuerySet.with_user_progress`
+            if self.user_has_certificate:
+                return Status.FINISHED
+            return Status.PROGRESS if self.user_paid else Status.NEW
         try:
             if CourseCertificate.objects.filter(user=user, course=self).exists():
                 return Status.FINISHED
@@ -140,6 +163,8 @@ class CertificatedCourse(CourseBase):
                   'with the discount percent. Works if a user did not paid for'
                   ' any of the sub courses'
     )
+    lessons_count = models.PositiveIntegerField(_('Lessons count'), default=0, editable=False)
+    sub_courses_count = models.PositiveIntegerField(_('Sub courses count'), default=0, editable=False)
 
     class Meta:
         verbose_name = _('Certificated course')
@@ -182,23 +207,14 @@ class CertificatedCourse(CourseBase):
             return self.sub_courses.exclude(id__in=paid_courses_id), True
         return self.sub_courses.all(), False
 
-    @property
-    def lessons_count(self):
-        return sum([course.lessons_count for course in self.sub_courses.all()])
-
-    @property
-    def sub_courses_count(self):
-        return self.sub_courses.count()
-
     def is_completed(self, user: User):
         """If certificated course completed by the user"""
-        completed_courses_in_certificated_course = 0
-        for sub_course in self.sub_courses.all():
-            if sub_course.is_completed(user=user):
-                completed_courses_in_certificated_course += 1
-
-            if completed_courses_in_certificated_course == self.sub_courses.count():
-                return True
+        from .utils.progress import get_courses_progress
+        sub_course_ids = list(self.sub_courses.values_list('id', flat=True))
+        if not sub_course_ids:
+            return False
+        progress = get_courses_progress(user, sub_course_ids)
+        return all(progress[course_id].is_completed() for course_id in sub_course_ids)
 
     def get_status(self, user: User):
         try:
@@ -212,17 +228,34 @@ class CertificatedCourse(CourseBase):
         return Status.NEW
 
 
+def generate_verify_token() -> str:
+    """Random token of the certificate verification link. The uniqueness is guaranteed by the unique index"""
+    return secrets.token_urlsafe(32)
+
+
 class CourseCertificate(models.Model):
     """Certificate for course completing"""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        READY = 'ready', _('Ready')
+        FAILED = 'failed', _('Failed')
+
     user = models.ForeignKey(User, verbose_name=_('User'), on_delete=models.DO_NOTHING, related_name='certificates')
     course = models.ForeignKey(Course, on_delete=models.DO_NOTHING, related_name='certificates', blank=True, null=True)
-    hash = models.CharField(_('Hash for verify'), max_length=150, blank=True, null=True)
+    hash = models.CharField(_('Hash for verify'), max_length=150, unique=True, default=generate_verify_token)
     certificated_course = models.ForeignKey(CertificatedCourse, on_delete=models.DO_NOTHING,
                                             related_name='certificates', blank=True, null=True)
     pdf = models.FileField(upload_to='files/courses/certificates/', verbose_name=_('PDF file'), blank=True, null=True)
     created_at = models.DateTimeField(verbose_name=_('Created at'), auto_now_add=True)
     qr = models.ImageField(upload_to='images/courses/certificates/',
                            verbose_name=_('QR code (link to the certificate)'), blank=True, null=True)
+    status = models.CharField(
+        _('Status'), max_length=20, choices=Status.choices, default=Status.PENDING,
+        help_text=_('The files are generated by the certificates worker'))
+    render_hash = models.CharField(
+        _('Render hash'), max_length=64, blank=True, editable=False,
+        help_text=_('Hash of the template and the data of the generated files'))
 
     class Meta:
         verbose_name = _('Course certificate')
@@ -245,9 +278,48 @@ class CourseCertificate(models.Model):
         return self.certificated_course
 
 
+class CertificateJob(models.Model):
+    """Queued generation of the certificate files, processed by the `run_certificates_worker` command"""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    key = models.CharField(
+        _('Idempotency key'), max_length=100, unique=True, help_text=_('User and the (certificated) course'))
+    certificate = models.OneToOneField(CourseCertificate, on_delete=models.CASCADE, related_name='job')
+    domain = models.CharField(_('Domain for the QR code link'), max_length=255)
+    status = models.CharField(_('Status'), max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(_('Attempts'), default=0)
+    run_after = models.DateTimeField(_('Run after'), default=timezone.now)
+    locked_at = models.DateTimeField(_('Locked at'), blank=True, null=True)
+    last_error = models.TextField(_('Last error'), blank=True)
+    created_at = models.DateTimeField(_('Created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('Updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Certificate job')
+        verbose_name_plural = _('Certificates jobs')
+        ordering = ['id']
+        index_together = ('status', 'run_after')
+
+    def __str__(self):
+        return f'{self.key} ({self.status})'
+
+    @staticmethod
+    def get_key(user_id: int, course_id: int = None, certificated_course_id: int = None) -> str:
+        if course_id:
+            return f'{user_id}:course:{course_id}'
+        return f'{user_id}:certificated-course:{certificated_course_id}'
+
+
 class Topic(TimestampedModel):
     course = models.ForeignKey(Course, verbose_name=_('Course'), on_delete=models.CASCADE, related_name='topic_courses')
     name = models.CharField(max_length=100, verbose_name=_('Topic name'))
+    position = models.PositiveIntegerField(
+        _('Position in the course'), default=0, db_index=True, editable=False)
 
     class Meta:
         verbose_name = _('Topic')
@@ -259,14 +331,16 @@ class Topic(TimestampedModel):
 
     def get_index_in_course_topics(self):
         """Returns the topic index (position) in list of all the course topics"""
-        return list(self.course.topics_list).index(self)
+        return self.position
 
     @property
     def previous_topic(self):
-        topic_index = self.get_index_in_course_topics()
-        if topic_index == 0:
-            raise IndexError('Previous lesson doesnt exist')
-        return self.course.topics_list[topic_index - 1]
+        topic = None
+        if self.position > 0:
+            topic = Topic.objects.filter(course_id=self.course_id, position=self.position - 1).first()
+        if topic is None:
+            raise IndexError('Previous topic doesnt exist')
+        return topic
 
 
 class UserLesson(models.Model):
@@ -291,6 +365,8 @@ class Lesson(TimestampedModel):
     topic = models.ForeignKey(Topic, verbose_name=_('Topic'), on_delete=models.PROTECT, related_name='lessons')
     name = models.CharField(max_length=255, verbose_name=_('Lesson Name'))
     description = RichTextUploadingField(verbose_name=_('Lesson Description'))
+    position = models.PositiveIntegerField(
+        _('Position in the course'), default=0, db_index=True, editable=False)
 
     class Meta:
         verbose_name = _('Lesson')
@@ -301,42 +377,37 @@ class Lesson(TimestampedModel):
         return self.name
 
     def get_process_status(self, user: User):
-        try:
-            return user.lessons.get(lesson=self).status
-        except UserLesson.DoesNotExist:
-            return Status.NEW
+        from .utils.progress import get_course_progress
+        return get_course_progress(user, self.course).get_lesson_status(self.id)
 
     def get_index_in_course_lessons(self):
         """Returns the lesson index (position) in list of all the course lessons"""
-        return self.course.lessons_list.index(self)
+        return self.position
+
+    def get_course_lesson(self, position: int):
+        """Lesson of the same course with the given position"""
+        if position < 0:
+            return None
+        return Lesson.objects.filter(topic__course_id=self.topic.course_id, position=position).first()
 
     @property
     def previous_lesson(self):
-        lesson_index = self.get_index_in_course_lessons()
-        if lesson_index == 0:
+        lesson = self.get_course_lesson(self.position - 1)
+        if lesson is None:
             raise IndexError('Previous lesson doesnt exist')
-        return self.course.lessons_list[lesson_index - 1]
+        return lesson
+
+    @property
+    def next_lesson(self):
+        lesson = self.get_course_lesson(self.position + 1)
+        if lesson is None:
+            raise IndexError('Next lesson doesnt exist')
+        return lesson
 
     def is_blocked(self, user: User = None) -> bool:
         """Is lesson blocked for given user"""
-        try:
-            previous_lesson_id = self.previous_lesson.id
-        except IndexError:
-            return False  # If the lesson is first, it's not blocked
-
-        # Check if the previous quiz was passed
-        try:
-            if not user.is_authenticated or not self.topic.previous_topic.quiz.is_completed(user):
-                return True
-        except (IndexError, Topic.quiz.RelatedObjectDoesNotExist):
-            pass
-
-        # Check if the course was paid (But first and second lessons are free)
-        if not user.profile.is_course_paid(course=self.course):
-            return True
-
-        # Check if the previous lesson was completed
-        return not user.lessons.filter(lesson__id=previous_lesson_id, status=Status.FINISHED).exists()
+        from .utils.progress import get_course_progress
+        return get_course_progress(user, self.course).is_lesson_blocked(self.id)
 
     def is_lesson_finished(self, user: User) -> bool:
         """Check if there lesson is finished by a user"""
@@ -363,10 +434,311 @@ class UserCourse(TimestampedModel):
         return f'#{self.id} | {self.user.get_full_name()} - {self.course.name}'
 
 
-def pre_save_parent_category(sender, instance, **kwargs):
-    instance.path = instance.title
-    parent_category_obj = instance.parent_category
-    while parent_category_obj is not None:
-        instance.path = parent_category_obj.title + " > " + instance.path
-        parent_category_obj = parent_category_obj.parent_category
+class SearchTerm(models.Model):
+    """Inverted index entry: a term of the indexed object text.
+    Filled by `utils.search`, used by the `?q=` search of topics, lessons and quizzes
+    """
+
+    class ObjectType(models.TextChoices):
+        TOPIC = 'topic', _('Topic')
+        LESSON = 'lesson', _('Lesson')
+        QUIZ = 'quiz', _('Quiz')
+
+    term = models.CharField(_('Term'), max_length=64)
+    object_type = models.CharField(_('Object type'), max_length=10, choices=ObjectType.choices)
+    object_id = models.PositiveIntegerField(_('Object id'))
+    weight = models.SmallIntegerField(_('Weight'), default=1)
+
+    class Meta:
+        verbose_name = _('Search term')
+        verbose_name_plural = _('Search terms')
+        index_together = ('object_type', 'object_id')
+        # The pattern operator classes let PostgreSQL use the index for the prefix LIKE 'x%' of any collation
+        indexes = [
+            models.Index(
+                fields=['object_type', 'term'], name='courses_searchterm_prefix',
+                opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.term} - {self.object_type} #{self.object_id}'
+
+
+CATEGORY_TREE_CACHE_KEY = 'courses:category-tree'
+
+
+def rebuild_category_tree() -> int:
+    """Recompute `path` and `tree_path` of all the categories with one SELECT
+    and one bulk UPDATE of the changed rows.
+    :return count of the updated categories
+    """
+    categories = {
+        category.id: category
+        for category in Category.objects.only('id', 'parent_category_id', 'title', 'path', 'tree_path')
+    }
+    trees = {}  # {id: (path, tree_path)}
+    for category_id in categories:
+        chain = []
+        current_id = category_id
+        while current_id in categories and current_id not in trees and current_id not in chain:
+            chain.append(current_id)
+            current_id = categories[current_id].parent_category_id
+
+        path, tree_path = trees.get(current_id, (None, '/'))
+        for chain_id in reversed(chain):
+            title = categories[chain_id].title
+            path = f'{path} > {title}' if path else title
+            tree_path = f'{tree_path}{chain_id}/'
+            trees[chain_id] = (path, tree_path)
+
+    categories_to_update = []
+    for category_id, (path, tree_path) in trees.items():
+        category = categories[category_id]
+        if (category.path, category.tree_path) != (path, tree_path):
+            category.path, category.tree_path = path, tree_path
+            categories_to_update.append(category)
+    Category.objects.bulk_update(categories_to_update, ['path', 'tree_path'])
+    return len(categories_to_update)
+
+
+def update_category_subtree(category: Category) -> int:
+    """Recompute `path` and `tree_path` of the category and of its descendants,
+    which are found by the stored tree path of the category. The other categories aren't read.
+    :return count of the updated categories
+    """
+    old_tree_path = category.tree_path
+    parent = None
+    if category.parent_category_id:
+        parent = Category.objects.filter(id=category.parent_category_id).values_list('path', 'tree_path').first()
+        if parent is None or (old_tree_path and parent[1].startswith(old_tree_path)):
+            # The category is moved under its own descendant
+            return rebuild_category_tree()
+
+    path = f'{parent[0]} > {category.title}' if parent else category.title
+    trees = {category.id: (path, f'{parent[1] if parent else "/"}{category.id}/')}
+    categories_to_update = []
+    if (category.path, category.tree_path) != trees[category.id]:
+        category.path, category.tree_path = trees[category.id]
+        categories_to_update.append(category)
+
+    descendants = []
+    if old_tree_path:
+        descendants = list(Category.objects.filter(tree_path__startswith=old_tree_path).exclude(
+            id=category.id).only('id', 'parent_category_id', 'title', 'path', 'tree_path'))
+    # The parents are before their children
+    for descendant in sorted(descendants, key=lambda descendant: descendant.tree_path.count('/')):
+        if descendant.parent_category_id not in trees:
+            return rebuild_category_tree()
+        parent_path, parent_tree_path = trees[descendant.parent_category_id]
+        trees[descendant.id] = (f'{parent_path} > {descendant.title}', f'{parent_tree_path}{descendant.id}/')
+        if (descendant.path, descendant.tree_path) != trees[descendant.id]:
+            descendant.path, descendant.tree_path = trees[descendant.id]
+            categories_to_update.append(descendant)
+
+    Category.objects.bulk_update(categories_to_update, ['path', 'tree_path'])
+    return len(categories_to_update)
+
+
+def pre_save_parent_category(sender, instance, raw=False, **kwargs):
+    parent_category = instance.parent_category
+    instance.path = f'{parent_category.path} > {instance.title}' if parent_category else instance.title
+    # Remember the tree fields, the subtree is updated only if they change
+    instance._previous_tree_fields = None
+    if not raw and instance.pk:
+        instance._previous_tree_fields = Category.objects.filter(pk=instance.pk).values_list(
+            'parent_category_id', 'title', 'tree_path').first()
 pre_save.connect(pre_save_parent_category, sender=Category)
+
+
+def post_save_category_tree(sender, instance, raw=False, created=False, **kwargs):
+    """Update the materialized paths of the changed subtree and drop the cached tree"""
+    if raw:
+        return
+    previous_tree_fields = getattr(instance, '_previous_tree_fields', None)
+    if created or previous_tree_fields is None or previous_tree_fields[:2] != (
+            instance.parent_category_id, instance.title):
+        if previous_tree_fields is not None:
+            instance.tree_path = previous_tree_fields[2]
+        update_category_subtree(instance)
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
+post_save.connect(post_save_category_tree, sender=Category)
+
+
+def post_delete_category_tree(sender, instance, **kwargs):
+    """The children of the deleted category become the roots, update their subtrees"""
+    if instance.tree_path:
+        for child in Category.objects.filter(parent_category=None, tree_path__startswith=instance.tree_path):
+            update_category_subtree(child)
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
+post_delete.connect(post_delete_category_tree, sender=Category)
+
+
+def update_course_positions(course_id: int) -> None:
+    """Renumber the course topics and lessons. Topics are ordered by id,
+    lessons by the topic and id. Only the changed rows are updated
+    """
+    topics_to_update = []
+    topics = Topic.objects.filter(course_id=course_id).order_by('id').only('id', 'position')
+    for position, topic in enumerate(topics):
+        if topic.position != position:
+            topic.position = position
+            topics_to_update.append(topic)
+    Topic.objects.bulk_update(topics_to_update, ['position'])
+
+    lessons_to_update = []
+    lessons = Lesson.objects.filter(topic__course_id=course_id).order_by('topic_id', 'id').only('id', 'position')
+    for position, lesson in enumerate(lessons):
+        if lesson.position != position:
+            lesson.position = position
+            lessons_to_update.append(lesson)
+    Lesson.objects.bulk_update(lessons_to_update, ['position'])
+
+
+def update_courses_counters(courses) -> None:
+    """Recount topics and lessons of the courses queryset with one UPDATE"""
+    topics = Topic.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    lessons = Lesson.objects.filter(topic__course=OuterRef('pk')).order_by().values('topic__course')
+    courses.update(
+        topics_count=Coalesce(Subquery(topics.annotate(count=Count('id')).values('count')), 0),
+        lessons_count=Coalesce(Subquery(lessons.annotate(count=Count('id')).values('count')), 0),
+    )
+
+
+def update_certificated_courses_counters(certificated_courses) -> None:
+    """Recount sub courses and their lessons of the certificated courses queryset with one UPDATE.
+    Sub courses counters must be up to date
+    """
+    sub_courses = Course.objects.filter(certificated_courses=OuterRef('pk')).order_by().values('certificated_courses')
+    certificated_courses.update(
+        sub_courses_count=Coalesce(Subquery(sub_courses.annotate(count=Count('id')).values('count')), 0),
+        lessons_count=Coalesce(Subquery(sub_courses.annotate(total=Sum('lessons_count')).values('total')), 0),
+    )
+
+
+def update_course_structure(course_id: int) -> None:
+    """Update positions and counters after the course topics or lessons were changed"""
+    update_course_positions(course_id)
+    update_courses_counters(Course.objects.filter(id=course_id))
+    update_certificated_courses_counters(CertificatedCourse.objects.filter(sub_courses=course_id))
+
+
+def pre_save_remember_course(sender, instance, raw=False, **kwargs):
+    """Remember the course the topic/lesson belonged to, to renumber it if the object moves"""
+    if raw or not instance.pk:
+        return
+    lookup = 'course_id' if sender is Topic else 'topic__course_id'
+    instance._previous_course_id = sender.objects.filter(pk=instance.pk).values_list(lookup, flat=True).first()
+pre_save.connect(pre_save_remember_course, sender=Topic)
+pre_save.connect(pre_save_remember_course, sender=Lesson)
+
+
+def post_change_update_course_structure(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    course_id = instance.course_id if sender is Topic else instance.topic.course_id
+    update_course_structure(course_id)
+    previous_course_id = getattr(instance, '_previous_course_id', None)
+    if previous_course_id and previous_course_id != course_id:
+        update_course_structure(previous_course_id)
+post_save.connect(post_change_update_course_structure, sender=Topic)
+post_save.connect(post_change_update_course_structure, sender=Lesson)
+post_delete.connect(post_change_update_course_structure, sender=Topic)
+post_delete.connect(post_change_update_course_structure, sender=Lesson)
+
+
+def m2m_changed_sub_courses(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recount the certificated courses which sub courses were changed"""
+    if reverse and action == 'pre_clear':
+        instance._certificated_course_ids = list(instance.certificated_courses.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        certificated_course_ids = [instance.pk]
+    elif action == 'post_clear':
+        certificated_course_ids = getattr(instance, '_certificated_course_ids', [])
+    else:
+        certificated_course_ids = pk_set
+    update_certificated_courses_counters(CertificatedCourse.objects.filter(id__in=certificated_course_ids))
+m2m_changed.connect(m2m_changed_sub_courses, sender=CertificatedCourse.sub_courses.through)
+
+
+def pre_delete_course(sender, instance, **kwargs):
+    instance._certificated_course_ids = list(instance.certificated_courses.values_list('id', flat=True))
+pre_delete.connect(pre_delete_course, sender=Course)
+
+
+def post_delete_course(sender, instance, **kwargs):
+    certificated_course_ids = getattr(instance, '_certificated_course_ids', [])
+    update_certificated_courses_counters(CertificatedCourse.objects.filter(id__in=certificated_course_ids))
+post_delete.connect(post_delete_course, sender=Course)
+
+
+def post_change_invalidate_certificate_verification(sender, instance, **kwargs):
+    from .utils.certificates.verification import invalidate_certificate_verification
+    invalidate_certificate_verification(instance.hash)
+post_save.connect(post_change_invalidate_certificate_verification, sender=CourseCertificate)
+post_delete.connect(post_change_invalidate_certificate_verification, sender=CourseCertificate)
+
+
+def post_change_bump_cache_version(sender, **kwargs):
+    """Invalidate the cached catalog responses which depend on the changed model"""
+    if sender is CertificatedCourse.sub_courses.through:
+        bump_model_version(CertificatedCourse)
+        bump_model_version(Course)
+    elif sender._meta.label in ('quiz.Question', 'quiz.Answer'):
+        # The quizzes data of the responses (e.g. the questions count) depends on them
+        bump_model_version('quiz.Quiz')
+    else:
+        bump_model_version(sender)
+for model in (Course, Category, Topic, Lesson, CertificatedCourse, 'quiz.Quiz', 'quiz.Question', 'quiz.Answer'):
+    post_save.connect(post_change_bump_cache_version, sender=model)
+    post_delete.connect(post_change_bump_cache_version, sender=model)
+m2m_changed.connect(post_change_bump_cache_version, sender=CertificatedCourse.sub_courses.through)
+
+
+def post_save_index_course_topics(sender, instance, raw=False, **kwargs):
+    """Topics are found by the course name too"""
+    from .utils.search import ObjectType, index_objects
+    if not raw:
+        index_objects(ObjectType.TOPIC, instance.topic_courses.all())
+post_save.connect(post_save_index_course_topics, sender=Course)
+
+
+def post_save_index_topic(sender, instance, raw=False, **kwargs):
+    """Lessons and quiz of the topic are found by the topic name too"""
+    from ..quiz.models import Quiz
+    from .utils.search import ObjectType, index_objects
+    if not raw:
+        index_objects(ObjectType.TOPIC, Topic.objects.filter(id=instance.id))
+        index_objects(ObjectType.LESSON, instance.lessons.all())
+        index_objects(ObjectType.QUIZ, Quiz.objects.filter(topic=instance))
+post_save.connect(post_save_index_topic, sender=Topic)
+
+
+def post_save_index_lesson(sender, instance, raw=False, **kwargs):
+    from .utils.search import ObjectType, index_objects
+    if not raw:
+        index_objects(ObjectType.LESSON, Lesson.objects.filter(id=instance.id))
+post_save.connect(post_save_index_lesson, sender=Lesson)
+
+
+def post_save_index_quiz(sender, instance, raw=False, **kwargs):
+    from .utils.search import ObjectType, index_objects
+    if not raw:
+        index_objects(ObjectType.QUIZ, sender.objects.filter(id=instance.id))
+post_save.connect(post_save_index_quiz, sender='quiz.Quiz')
+
+
+def post_delete_remove_from_index(sender, instance, **kwargs):
+    from .utils.search import ObjectType, remove_objects
+    object_types = {
+        'courses.Topic': ObjectType.TOPIC,
+        'courses.Lesson': ObjectType.LESSON,
+        'quiz.Quiz': ObjectType.QUIZ,
+    }
+    remove_objects(object_types[sender._meta.label], [instance.id])
+for model in (Topic, Lesson, 'quiz.Quiz'):
+    post_delete.connect(post_delete_remove_from_index, sender=model)
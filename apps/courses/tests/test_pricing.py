@@ -0,0 +1,91 @@
+import random
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import Course, CertificatedCourse, CourseCertificate
+from ..utils.pricing import CertificatedCoursesPricing
+from ...accounts.models import User
+from ...carts.models import Cart, CartCourse
+from ...profiles.models import Profile
+
+
+class CertificatedCoursesPricingTests(TestCase):
+    """The pricing gives the same results as the `CertificatedCourse` methods on generated data"""
+    rounds_count = 20
+    seed = 20210820
+
+    def setUp(self):
+        self.random = random.Random(self.seed)
+
+    def create_courses(self, count: int) -> list:
+        return [
+            Course.objects.create(
+                name=f'Course {i}', author='Author', description='Description', image='images/courses/course.png',
+                price=Decimal(self.random.randint(0, 5000)) / 10,
+                old_price=Decimal(self.random.randint(0, 5000)) / 10,
+            )
+            for i in range(count)
+        ]
+
+    def create_certificated_courses(self, courses: list, count: int) -> list:
+        certificated_courses = []
+        for i in range(count):
+            certificated_course = CertificatedCourse.objects.create(
+                name=f'Certificated course {i}', description='Description', image='images/courses/course.png',
+                discount_percent=self.random.choice([0, 0, 10, 25, 33, 100]),
+            )
+            certificated_course.sub_courses.set(self.random.sample(courses, self.random.randint(0, len(courses))))
+            certificated_courses.append(certificated_course)
+        return certificated_courses
+
+    def create_user(self, number: int, courses: list, certificated_courses: list) -> User:
+        user = User.objects.create(phone=f'+99890{number:07d}')
+        Profile.objects.create(user=user)
+        cart = Cart.objects.create(user=user)
+        for course in courses:
+            if self.random.random() < 0.3:
+                CartCourse.objects.create(cart=cart, course=course, paid=True, insert_type=CartCourse.InsertType.PAID)
+            elif self.random.random() < 0.2:
+                CartCourse.objects.create(cart=cart, course=course)
+            if self.random.random() < 0.1:
+                CourseCertificate.objects.create(user=user, course=course)
+        for certificated_course in certificated_courses:
+            if self.random.random() < 0.1:
+                CourseCertificate.objects.create(user=user, certificated_course=certificated_course)
+        return user
+
+    def test_same_as_model_methods(self):
+        for number in range(self.rounds_count):
+            courses = self.create_courses(self.random.randint(1, 6))
+            certificated_courses = self.create_certificated_courses(courses, self.random.randint(1, 4))
+            user = self.create_user(number, courses, certificated_courses)
+            pricing = CertificatedCoursesPricing(certificated_courses, user)
+
+            for certificated_course in certificated_courses:
+                with self.subTest(round=number, certificated_course=certificated_course.id):
+                    self.assertEqual(pricing.price(certificated_course), certificated_course.price)
+                    self.assertEqual(pricing.old_price(certificated_course), certificated_course.old_price)
+                    self.assertEqual(
+                        pricing.get_price_for_user(certificated_course),
+                        certificated_course.get_price_for_user(user)
+                    )
+
+                    unpaid_courses, paid_exists = certificated_course.get_unpaid_courses(user)
+                    unpaid_course_ids, pricing_paid_exists = pricing.get_unpaid_course_ids(certificated_course)
+                    self.assertEqual(sorted(unpaid_course_ids), sorted(course.id for course in unpaid_courses))
+                    self.assertEqual(pricing_paid_exists, paid_exists)
+
+                    self.assertEqual(pricing.get_status(certificated_course), certificated_course.get_status(user))
+
+    def test_anonymous_user_gets_catalog_prices(self):
+        courses = self.create_courses(4)
+        certificated_courses = self.create_certificated_courses(courses, 3)
+        pricing = CertificatedCoursesPricing(certificated_courses)
+
+        for certificated_course in certificated_courses:
+            unpaid_course_ids, paid_exists = pricing.get_unpaid_course_ids(certificated_course)
+            self.assertFalse(paid_exists)
+            self.assertEqual(
+                sorted(unpaid_course_ids), sorted(certificated_course.sub_courses.values_list('id', flat=True)))
+            self.assertEqual(pricing.get_price_for_user(certificated_course), certificated_course.price)
@@ -0,0 +1,64 @@
+import threading
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+
+from ..models import Course
+from ..utils.views_counter import CourseViewsCounter
+
+
+class CourseViewsCounterTests(TestCase):
+    threads_count = 8
+    views_per_thread = 500
+
+    def setUp(self):
+        self.courses = [
+            Course.objects.create(name=f'Course {i}', author='Author', description='Description',
+                                  image='images/courses/course.png')
+            for i in range(3)
+        ]
+        # The background flusher doesn't run during the test
+        self.counter = CourseViewsCounter(flush_interval=60 * 60)
+
+    def test_concurrent_views_are_not_lost(self):
+        """Detail requests add the views from many threads while the views are flushed"""
+        def view_courses():
+            for i in range(self.views_per_thread):
+                self.counter.add(self.courses[i % len(self.courses)].id)
+
+        threads = [threading.Thread(target=view_courses) for _ in range(self.threads_count)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            self.counter.flush()
+        for thread in threads:
+            thread.join()
+        self.counter.flush()
+
+        total_views = sum(Course.objects.filter(
+            id__in=[course.id for course in self.courses]).values_list('views', flat=True))
+        self.assertEqual(total_views, self.threads_count * self.views_per_thread)
+        for course in self.courses:
+            self.assertEqual(self.counter.get_pending(course.id), 0)
+
+    def test_viewed_count_includes_pending_views(self):
+        course = self.courses[0]
+        with mock.patch('apps.courses.utils.views_counter.course_views_counter', self.counter):
+            self.counter.add(course.id, 3)
+            self.assertEqual(course.viewed_count, 3)
+            self.counter.flush()
+            course.refresh_from_db()
+            self.assertEqual(course.viewed_count, 3)
+
+    def test_failed_flush_keeps_views(self):
+        course = self.courses[0]
+        self.counter.add(course.id, 2)
+        with mock.patch.object(Course.objects, 'filter', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.counter.flush()
+        self.assertEqual(self.counter.get_pending(course.id), 2)
+
+        self.counter.flush()
+        course.refresh_from_db()
+        self.assertEqual(course.views, 2)
@@ -0,0 +1,14 @@
+from django.core.cache import cache
+
+from ..models import Category, CATEGORY_TREE_CACHE_KEY
+
+
+def get_category_tree() -> list:
+    """Active root categories with their children. The tree is cached
+    until any category is saved or deleted
+    """
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = list(Category.objects.filter(parent_category=None, is_active=True).prefetch_related('children'))
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, None)
+    return tree
@@ -1,44 +1,67 @@
-import os
+import base64
 import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
 from io import BytesIO
-from random import randint
 
 import pdfkit
 import qrcode
-from django.core.files import File
-from django.core.files.base import ContentFile
+from django.utils.html import escape
 
 from ....accounts.models import User
 from ....courses.models import CourseCertificate, Course, CertificatedCourse
+from .storage import save_content_addressed
 
+CERTIFICATE_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), 'certificate.html')
+TEMPLATE_FIELDS_RE = re.compile(r'(certname|coursename|awarddate|qrcode)')
+TEMPLATE_RESOURCE_RE = re.compile(r'url\([\'"]?(data/[^\'")]+)[\'"]?\)')
 
-def get_modified_html(html: str, text_to_split: str, value_to_insert: str):
-    """text_to_split: text which will be popped. Value_to_insert will be added to that place"""
-    html_parts = html.split(text_to_split)
-    html_parts[1] = f'{value_to_insert} {html_parts[1]}'
-    return ''.join(html_parts)
 
+def get_data_uri(content: bytes, mime_type: str) -> str:
+    return f'data:{mime_type};base64,{base64.b64encode(content).decode()}'
 
-def create_certificate_pdf(full_name: str, image_path: str, award_date, course_name: str,
-                           certificate_path: str = 'apps/courses/utils/certificates/certificate.html'):
-    """Get the html code, edit it, save the modified version in a file.
-    Generate a pdf from the new html and delete the html file
+
+@lru_cache(maxsize=None)
+def get_certificate_template(certificate_path: str = CERTIFICATE_TEMPLATE_PATH) -> tuple:
+    """Read and parse the template once per process. The font and the background are inlined
+    as data URIs, so the html doesn't depend on its location.
+    :return the template parts, the odd parts are the names of the fields
     """
     with open(certificate_path, 'r') as certificate_file:
         certificate_html = certificate_file.read().replace('\n', '')
 
-    certificate_html = get_modified_html(certificate_html, 'certname', full_name)
-    certificate_html = get_modified_html(certificate_html, 'qrcode', f'<img src="/code/{image_path}" />')
-    certificate_html = get_modified_html(certificate_html, 'awarddate', award_date.strftime("%m/%d/%Y"))
-    certificate_html = get_modified_html(certificate_html, 'coursename', course_name)
+    def inline_resource(match):
+        resource_path = os.path.join(os.path.dirname(certificate_path), match.group(1))
+        mime_type = mimetypes.guess_type(resource_path)[0] or 'application/octet-stream'
+        with open(resource_path, 'rb') as resource:
+            return f'url("{get_data_uri(resource.read(), mime_type)}")'
+
+    certificate_html = TEMPLATE_RESOURCE_RE.sub(inline_resource, certificate_html)
+    return tuple(TEMPLATE_FIELDS_RE.split(certificate_html))
+
+
+def get_certificate_html(full_name: str, qr_image: bytes, award_date, course_name: str,
+                         certificate_path: str = CERTIFICATE_TEMPLATE_PATH) -> str:
+    """Fill the cached template in memory"""
+    values = {
+        'certname': escape(full_name),
+        'qrcode': f'<img src="{get_data_uri(qr_image, "image/png")}" />',
+        'awarddate': award_date.strftime("%m/%d/%Y"),
+        'coursename': escape(course_name),
+    }
+    return ''.join(
+        f'{values[part]} ' if index % 2 else part
+        for index, part in enumerate(get_certificate_template(certificate_path))
+    )
 
-    new_certificate_path = f'apps/courses/utils/certificates/certificate{randint(0, 999999)}.html'
-    with open(new_certificate_path, 'w') as html:
-        html.write(certificate_html)
 
-    certificate_pdf = pdfkit.from_file(new_certificate_path, False)
-    os.remove(new_certificate_path)
-    return certificate_pdf
+def create_certificate_pdf(full_name: str, qr_image: bytes, award_date, course_name: str,
+                           certificate_path: str = CERTIFICATE_TEMPLATE_PATH) -> bytes:
+    """Generate a pdf from the html string, without temporary files"""
+    certificate_html = get_certificate_html(full_name, qr_image, award_date, course_name, certificate_path)
+    return pdfkit.from_string(certificate_html, False)
 
 
 def create_bytes_certificate_qrcode(qrcode_data: str):
@@ -49,27 +72,49 @@ def create_bytes_certificate_qrcode(qrcode_data: str):
 
 
 def create_certificate(user: User, domain: str, course: Course = None, certificated_course: CertificatedCourse = None):
+    """Create the certificate with its files synchronously. The API queues them with `request_certificate`"""
     assert course or certificated_course, "Course or certificated course must be defined"
     if course:
         certificate = CourseCertificate.objects.create(user=user, course=course)
     else:
         certificate = CourseCertificate.objects.create(user=user, certificated_course=certificated_course)
 
-    certificate_hash = f'{user.id}{randint(0, 99999)}-borow'
-    certificate.hash = hashlib.md5(bytes(certificate_hash, encoding='utf8')).hexdigest()
+    render_certificate(certificate, domain)
+    certificate.status = CourseCertificate.Status.READY
+    certificate.save()
+    return certificate
+
 
-    certificate_qr = create_bytes_certificate_qrcode(get_qr_data(certificate.hash, domain))
-    certificate.qr.save(f'{user.phone}.png', File(certificate_qr))
+@lru_cache(maxsize=None)
+def get_template_hash(certificate_path: str = CERTIFICATE_TEMPLATE_PATH) -> str:
+    """Changes with the template html, the font or the background"""
+    return hashlib.sha256(''.join(get_certificate_template(certificate_path)).encode()).hexdigest()
+
+
+def get_render_hash(certificate: CourseCertificate, domain: str) -> str:
+    """Hash of everything the certificate files are made of"""
+    content = '|'.join([
+        get_template_hash(),
+        certificate.user.profile.get_full_name(),
+        certificate.certificated_object.name,
+        certificate.created_at.strftime("%m/%d/%Y"),
+        get_qr_data(certificate.hash, domain),
+    ])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def render_certificate(certificate: CourseCertificate, domain: str) -> None:
+    """Generate the QR code and the PDF files of the certificate, stored by their content hashes"""
+    user = certificate.user
+    certificate.render_hash = get_render_hash(certificate, domain)
+    qr_image = create_bytes_certificate_qrcode(get_qr_data(certificate.hash, domain)).getvalue()
+    save_content_addressed(certificate.qr, qr_image, '.png')
 
     certificate_pdf = create_certificate_pdf(
-        full_name=user.profile.get_full_name(), image_path=certificate.qr.url,
+        full_name=user.profile.get_full_name(), qr_image=qr_image,
         award_date=certificate.created_at, course_name=certificate.certificated_object.name
     )
-    certificate.pdf.save(f'{randint(0, 3434)}{certificate.certificated_object.name}.pdf',
-                         ContentFile(certificate_pdf))
-
-    certificate.save()
-    return certificate
+    save_content_addressed(certificate.pdf, certificate_pdf, '.pdf')
 
 
 def get_qr_data(certificate_hash: str, domain: str) -> str:
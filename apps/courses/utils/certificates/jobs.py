@@ -0,0 +1,117 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ....accounts.models import User
+from ....courses.models import CertificateJob, CourseCertificate, Course, CertificatedCourse
+from .certificates import get_render_hash, render_certificate
+
+CERTIFICATE_DOMAIN = getattr(settings, 'CERTIFICATE_DOMAIN', 'aristotle.uz')
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+# Running jobs locked longer are considered lost by a stopped worker
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+def request_certificate(user: User, domain: str, course: Course = None,
+                        certificated_course: CertificatedCourse = None) -> CourseCertificate:
+    """Create a pending certificate with its verification token and queue the generation of its files.
+    Requesting the same (user, course) again returns the existing certificate
+    """
+    assert course or certificated_course, "Course or certificated course must be defined"
+    key = CertificateJob.get_key(
+        user.id, course.id if course else None, certificated_course.id if certificated_course else None)
+    try:
+        return CertificateJob.objects.select_related('certificate').get(key=key).certificate
+    except CertificateJob.DoesNotExist:
+        pass
+
+    certificate = CourseCertificate.objects.filter(
+        user=user, course=course, certificated_course=certificated_course).first()
+    if certificate is not None:
+        # Issued before the queue
+        return certificate
+
+    try:
+        with transaction.atomic():
+            certificate = CourseCertificate.objects.create(
+                user=user, course=course, certificated_course=certificated_course)
+            CertificateJob.objects.create(key=key, certificate=certificate, domain=domain)
+    except IntegrityError:
+        # The same certificate was requested concurrently
+        return CertificateJob.objects.select_related('certificate').get(key=key).certificate
+    return certificate
+
+
+def claim_jobs(limit: int = 10) -> list:
+    """Lock the due jobs for this worker. Concurrent workers skip the locked rows"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            CertificateJob.objects.select_for_update(skip_locked=True).filter(
+                status=CertificateJob.Status.PENDING, run_after__lte=now
+            ).order_by('run_after', 'id')[:limit]
+        )
+        stale_jobs = list(
+            CertificateJob.objects.select_for_update(skip_locked=True).filter(
+                status=CertificateJob.Status.RUNNING, locked_at__lt=now - LOCK_TIMEOUT
+            ).order_by('locked_at')[:max(limit - len(jobs), 0)]
+        )
+        jobs += stale_jobs
+        CertificateJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=CertificateJob.Status.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+    return list(CertificateJob.objects.filter(id__in=[job.id for job in jobs]).select_related(
+        'certificate__user__profile', 'certificate__course', 'certificate__certificated_course'))
+
+
+def run_job(job: CertificateJob) -> bool:
+    """Generate the certificate files, unless they are made of the same template and data.
+    Failed jobs are retried with a growing delay
+    :return whether the job is done
+    """
+    certificate = job.certificate
+    try:
+        if not certificate.pdf or certificate.render_hash != get_render_hash(certificate, job.domain):
+            render_certificate(certificate, job.domain)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = CertificateJob.Status.FAILED
+            certificate.status = CourseCertificate.Status.FAILED
+            certificate.save(update_fields=('status',))
+        else:
+            job.status = CertificateJob.Status.PENDING
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+        job.save(update_fields=('status', 'run_after', 'last_error', 'updated_at'))
+        return False
+
+    certificate.status = CourseCertificate.Status.READY
+    certificate.save(update_fields=('qr', 'pdf', 'render_hash', 'status'))
+    job.status = CertificateJob.Status.DONE
+    job.last_error = ''
+    job.save(update_fields=('status', 'last_error', 'updated_at'))
+    return True
+
+
+def process_jobs(limit: int = 10) -> tuple:
+    """:return (done jobs count, failed attempts count)"""
+    done_count = failed_count = 0
+    for job in claim_jobs(limit):
+        if run_job(job):
+            done_count += 1
+        else:
+            failed_count += 1
+    return done_count, failed_count
+
+
+def retry_job(job: CertificateJob) -> None:
+    """Queue a failed job again"""
+    job.status = CertificateJob.Status.PENDING
+    job.attempts = 0
+    job.run_after = timezone.now()
+    job.save(update_fields=('status', 'attempts', 'run_after', 'updated_at'))
+    CourseCertificate.objects.filter(id=job.certificate_id).update(status=CourseCertificate.Status.PENDING)
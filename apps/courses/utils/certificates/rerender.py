@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+from django.db import connections
+from django.utils import timezone
+
+from ....courses.models import CertificateJob, CourseCertificate
+from .certificates import get_render_hash, render_certificate
+from .jobs import CERTIFICATE_DOMAIN
+
+
+class RerenderResult(NamedTuple):
+    certificate_id: int
+    status: str  # rendered, skipped or failed
+    error: str = ''
+
+
+def rerender_certificate(certificate_id: int, domain: str = CERTIFICATE_DOMAIN, force: bool = False) -> RerenderResult:
+    """Regenerate the files of the certificate, unless they are made of the same template and data"""
+    try:
+        certificate = CourseCertificate.objects.select_related(
+            'user__profile', 'course', 'certificated_course').get(id=certificate_id)
+        if not force and certificate.pdf and certificate.render_hash == get_render_hash(certificate, domain):
+            return RerenderResult(certificate_id, 'skipped')
+        render_certificate(certificate, domain)
+        certificate.status = CourseCertificate.Status.READY
+        certificate.save(update_fields=('qr', 'pdf', 'render_hash', 'status'))
+    except Exception as e:
+        return RerenderResult(certificate_id, 'failed', repr(e))
+    return RerenderResult(certificate_id, 'rendered')
+
+
+def rerender_certificates(queryset, domain: str = CERTIFICATE_DOMAIN, processes: int = None, force: bool = False):
+    """Regenerate the files of the certificates with a process pool.
+    The results are yielded as they complete. The up to date certificates are skipped,
+    so an interrupted run is resumed by running it again
+    """
+    certificate_ids = list(queryset.order_by('id').values_list('id', flat=True))
+    # The forked processes open their own connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(rerender_certificate, certificate_id, domain, force) for certificate_id in certificate_ids
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def queue_certificates_rerender(queryset, domain: str = CERTIFICATE_DOMAIN) -> int:
+    """Queue the certificates to the certificates workers. The certificates stay valid meanwhile,
+    the workers skip the certificates which are up to date
+    :return count of the queued certificates
+    """
+    now = timezone.now()
+    certificates = list(queryset.values_list('id', 'user_id', 'course_id', 'certificated_course_id'))
+    # The running jobs are left to their workers, so a certificate isn't rendered twice at the same time
+    queued_count = CertificateJob.objects.filter(certificate__in=[row[0] for row in certificates]).exclude(
+        status=CertificateJob.Status.RUNNING).update(status=CertificateJob.Status.PENDING, attempts=0, run_after=now)
+
+    with_jobs = set(CertificateJob.objects.filter(
+        certificate__in=[row[0] for row in certificates]).values_list('certificate_id', flat=True))
+    new_jobs = [
+        CertificateJob(
+            key=CertificateJob.get_key(user_id, course_id, certificated_course_id),
+            certificate_id=certificate_id, domain=domain, run_after=now
+        )
+        for certificate_id, user_id, course_id, certificated_course_id in certificates
+        if certificate_id not in with_jobs
+    ]
+    # Duplicates of a (user, course) certificate, issued before the queue, share the key and are skipped
+    CertificateJob.objects.bulk_create(new_jobs, ignore_conflicts=True)
+    created_count = CertificateJob.objects.filter(
+        certificate__in=[job.certificate_id for job in new_jobs]).count() if new_jobs else 0
+    return queued_count + created_count
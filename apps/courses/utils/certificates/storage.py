@@ -0,0 +1,40 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files.base import ContentFile
+
+CONTENT_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+def get_content_name(field, content: bytes, extension: str) -> str:
+    """Storage name of the content in the field directory, e.g. files/courses/certificates/ab/ab12...ef.pdf"""
+    digest = hashlib.sha256(content).hexdigest()
+    return posixpath.join(field.upload_to, digest[:2], f'{digest}{extension}')
+
+
+def is_content_addressed(name: str) -> bool:
+    return bool(CONTENT_NAME_RE.search(name or ''))
+
+
+def save_content_addressed(field_file, content: bytes, extension: str) -> str:
+    """Point the file field to the content. The same content is written to the storage once
+    and shared by all the certificates which have it
+    :return the storage name
+    """
+    name = get_content_name(field_file.field, content, extension)
+    storage = field_file.storage
+    if not storage.exists(name):
+        saved_name = storage.save(name, ContentFile(content))
+        if saved_name != name:
+            # A concurrent writer stored the same content first, the storage gave the copy a free name
+            storage.delete(saved_name)
+    field_file.name = name
+    return name
+
+
+def get_file_url(field, name: str):
+    """Url of the stored file without loading the model"""
+    if not name:
+        return None
+    return field.storage.url(name)
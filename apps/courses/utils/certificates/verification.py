@@ -0,0 +1,43 @@
+import hashlib
+import re
+
+from django.core.cache import cache
+
+from ....courses.models import CourseCertificate
+from .storage import get_file_url
+
+VERIFICATION_KEY = 'courses:certificate-verify:{}'
+CERTIFICATE_VERIFY_MAX_AGE = 60 * 60 * 24
+# The random tokens and the md5 hashes of the old certificates. Other values aren't looked up,
+# they are not valid in the cache keys
+VERIFY_TOKEN_RE = re.compile(r'^[A-Za-z0-9_-]{32,150}$')
+
+
+def get_certificate_verification(token: str):
+    """Ready certificate data by the verification token, cached until the certificate is saved.
+    :return {'certificate_pdf': url, 'etag': str} or None
+    """
+    if not VERIFY_TOKEN_RE.match(token):
+        return None
+    key = VERIFICATION_KEY.format(token)
+    verification = cache.get(key)
+    if verification is not None:
+        return verification
+
+    row = CourseCertificate.objects.filter(hash=token, status=CourseCertificate.Status.READY).values_list(
+        'id', 'pdf', 'render_hash').first()
+    if row is None:
+        return None
+    certificate_id, pdf_name, render_hash = row
+    # Changes when the files are generated again or moved to another name
+    etag = hashlib.sha256(f'{render_hash or certificate_id}-{pdf_name}'.encode()).hexdigest()
+    verification = {
+        'certificate_pdf': get_file_url(CourseCertificate._meta.get_field('pdf'), pdf_name),
+        'etag': etag,
+    }
+    cache.set(key, verification, None)
+    return verification
+
+
+def invalidate_certificate_verification(token: str) -> None:
+    cache.delete(VERIFICATION_KEY.format(token))
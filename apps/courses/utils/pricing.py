@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from django.db.models import Q
+
+from ..models import Course, CertificatedCourse, CourseCertificate, Status
+
+
+class CertificatedCoursesPricing:
+    """Catalog and user prices of many certificated courses at once.
+
+    Reads the sub courses prices with one query and the user paid courses,
+    certificates with two more. Gives the same results as the `CertificatedCourse`
+    price methods, which query the sub courses for every certificated course
+    """
+
+    def __init__(self, certificated_courses, user=None):
+        self.certificated_courses = list(certificated_courses)
+        certificated_course_ids = [certificated_course.id for certificated_course in self.certificated_courses]
+
+        self.sub_courses = defaultdict(list)  # {certificated course id: [(course id, price, old price)]}
+        rows = CertificatedCourse.sub_courses.through.objects.filter(
+            certificatedcourse_id__in=certificated_course_ids
+        ).order_by('course_id').values_list('certificatedcourse_id', 'course_id', 'course__price', 'course__old_price')
+        for certificated_course_id, course_id, price, old_price in rows:
+            self.sub_courses[certificated_course_id].append((course_id, price, old_price))
+
+        self.paid_course_ids = set()
+        self.finished_course_ids = set()
+        self.finished_certificated_course_ids = set()
+        if user is not None and user.is_authenticated:
+            course_ids = {course_id for courses in self.sub_courses.values() for course_id, *_ in courses}
+            self.paid_course_ids = set(Course.objects.filter(
+                id__in=course_ids, cartcourse__cart__user=user, cartcourse__paid=True
+            ).values_list('id', flat=True))
+            certificates = CourseCertificate.objects.filter(
+                Q(course__in=course_ids) | Q(certificated_course__in=certificated_course_ids), user=user)
+            for course_id, certificated_course_id in certificates.values_list('course_id', 'certificated_course_id'):
+                if course_id:
+                    self.finished_course_ids.add(course_id)
+                if certificated_course_id:
+                    self.finished_certificated_course_ids.add(certificated_course_id)
+
+    def old_price(self, certificated_course):
+        return sum([old_price for _, _, old_price in self.sub_courses[certificated_course.id]])
+
+    def sub_courses_price(self, certificated_course):
+        return sum([price for _, price, _ in self.sub_courses[certificated_course.id]])
+
+    def price(self, certificated_course):
+        price = self.sub_courses_price(certificated_course)
+        if certificated_course.discount_percent > 0:
+            price -= (price * certificated_course.discount_percent / 100)
+        return price
+
+    def get_course_status(self, course_id: int) -> str:
+        """Same as `Course.get_status`"""
+        if course_id in self.finished_course_ids:
+            return Status.FINISHED
+        if course_id in self.paid_course_ids:
+            return Status.PROGRESS
+        return Status.NEW
+
+    def get_unpaid_course_ids(self, certificated_course) -> tuple:
+        """:return (unpaid_course_ids, paid_course_exists)"""
+        course_ids = [course_id for course_id, _, _ in self.sub_courses[certificated_course.id]]
+        paid_course_ids = [course_id for course_id in course_ids if self.get_course_status(course_id) != Status.NEW]
+        if paid_course_ids:
+            return [course_id for course_id in course_ids if course_id not in paid_course_ids], True
+        return course_ids, False
+
+    def get_price_for_user(self, certificated_course):
+        """If user bought a sub course, return price of the unpaid courses"""
+        course_ids, paid_exists = self.get_unpaid_course_ids(certificated_course)
+        if paid_exists:
+            if course_ids:
+                return sum([price for course_id, price, _ in self.sub_courses[certificated_course.id]
+                            if course_id in course_ids])
+        return self.price(certificated_course)
+
+    def get_status(self, certificated_course) -> str:
+        """Same as `CertificatedCourse.get_status`"""
+        if certificated_course.id in self.finished_certificated_course_ids:
+            return Status.FINISHED
+        for course_id, _, _ in self.sub_courses[certificated_course.id]:
+            if course_id in self.paid_course_ids:
+                return Status.PROGRESS
+        return Status.NEW
@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+from django.db.models import Q
+
+from ..models import Course, Status, Topic
+
+
+class CourseProgress:
+    """Snapshot of the user progress in a course.
+
+    Built with a fixed number of queries for any count of courses: the ordered
+    lessons with their topics and quizzes, the user lessons statuses,
+    the completed quizzes and the paid courses
+    """
+
+    def __init__(self, course_id: int, rows, lesson_statuses: dict = None, completed_quiz_ids: set = None,
+                 is_paid: bool = False, is_authenticated: bool = False):
+        """:param rows: (topic_id, quiz_id, lesson_id) of the course, ordered by the topics and lessons positions"""
+        self.course_id = course_id
+        self.topic_ids = []
+        self.topic_quizzes = {}
+        self.lesson_ids = []
+        self.lesson_topics = {}
+        self.topic_last_lessons = {}
+
+        for topic_id, quiz_id, lesson_id in rows:
+            if not self.topic_ids or self.topic_ids[-1] != topic_id:
+                self.topic_ids.append(topic_id)
+                self.topic_quizzes[topic_id] = quiz_id
+            if lesson_id is not None:
+                self.lesson_ids.append(lesson_id)
+                self.lesson_topics[lesson_id] = topic_id
+                self.topic_last_lessons[topic_id] = lesson_id
+
+        self.topic_positions = {topic_id: index for index, topic_id in enumerate(self.topic_ids)}
+        self.lesson_positions = {lesson_id: index for index, lesson_id in enumerate(self.lesson_ids)}
+
+        self.lesson_statuses = lesson_statuses or {}
+        self.completed_quiz_ids = completed_quiz_ids or set()
+        self.is_paid = is_paid
+        self.is_authenticated = is_authenticated
+
+    @classmethod
+    def load_many(cls, user, course_ids) -> dict:
+        """:return {course id: snapshot}"""
+        course_ids = set(course_ids)
+        rows = defaultdict(list)
+        for course_id, *row in Topic.objects.filter(course_id__in=course_ids).order_by(
+            'course_id', 'position', 'id', 'lessons__position', 'lessons__id'
+        ).values_list('course_id', 'id', 'quiz__id', 'lessons__id'):
+            rows[course_id].append(row)
+
+        lesson_statuses = defaultdict(dict)
+        completed_quiz_ids = set()
+        paid_course_ids = set()
+        is_authenticated = bool(user is not None and user.is_authenticated)
+        if is_authenticated:
+            for course_id, lesson_id, status in user.lessons.filter(
+                lesson__topic__course_id__in=course_ids
+            ).values_list('lesson__topic__course_id', 'lesson_id', 'status'):
+                lesson_statuses[course_id][lesson_id] = status
+            completed_quiz_ids = set(
+                user.quiz_takers.filter(
+                    Q(quiz__topic__course_id__in=course_ids) | Q(quiz__course_id__in=course_ids), completed=True
+                ).values_list('quiz_id', flat=True)
+            )
+            paid_course_ids = set(Course.objects.filter(
+                id__in=course_ids, cartcourse__cart__user=user, cartcourse__paid=True
+            ).values_list('id', flat=True))
+
+        return {
+            course_id: cls(
+                course_id, rows[course_id], lesson_statuses[course_id], completed_quiz_ids,
+                is_paid=course_id in paid_course_ids, is_authenticated=is_authenticated,
+            )
+            for course_id in course_ids
+        }
+
+    def get_lesson_position(self, lesson_id: int):
+        """:return index of the lesson in the course, None if the lesson isn't in the snapshot"""
+        return self.lesson_positions.get(lesson_id)
+
+    def get_lesson_status(self, lesson_id: int) -> str:
+        return self.lesson_statuses.get(lesson_id, Status.NEW)
+
+    def is_lesson_finished(self, lesson_id: int) -> bool:
+        return self.lesson_statuses.get(lesson_id) == Status.FINISHED
+
+    def is_quiz_completed(self, quiz_id: int) -> bool:
+        return quiz_id in self.completed_quiz_ids
+
+    def is_lesson_blocked(self, lesson_id: int) -> bool:
+        """Same rules as `Lesson.is_blocked`, but without queries"""
+        lesson_index = self.get_lesson_position(lesson_id)
+        if lesson_index is None:
+            return True  # The lesson isn't in the course snapshot, it's not available
+        if lesson_index == 0:
+            return False  # If the lesson is first, it's not blocked
+
+        if not self.is_authenticated:
+            return True
+
+        # Check if the previous quiz was passed
+        topic_index = self.topic_positions[self.lesson_topics[lesson_id]]
+        if topic_index > 0:
+            previous_topic_quiz_id = self.topic_quizzes[self.topic_ids[topic_index - 1]]
+            if previous_topic_quiz_id is not None and not self.is_quiz_completed(previous_topic_quiz_id):
+                return True
+
+        # Check if the course was paid (But the first lesson is free)
+        if not self.is_paid:
+            return True
+
+        # Check if the previous lesson was completed
+        return not self.is_lesson_finished(self.lesson_ids[lesson_index - 1])
+
+    def is_topic_quiz_blocked(self, topic_id: int) -> bool:
+        """Last lesson in the topic should be finished"""
+        last_lesson_id = self.topic_last_lessons.get(topic_id)
+        return last_lesson_id is None or not self.is_lesson_finished(last_lesson_id)
+
+    def is_final_quiz_blocked(self) -> bool:
+        """Last topic quiz should be passed. If the last topic hasn't a quiz, the last lesson should be finished"""
+        if not self.topic_ids:
+            return True
+        last_topic_quiz_id = self.topic_quizzes[self.topic_ids[-1]]
+        if last_topic_quiz_id is None:
+            return self.is_topic_quiz_blocked(self.topic_ids[-1])
+        return not self.is_quiz_completed(last_topic_quiz_id)
+
+    def is_completed(self) -> bool:
+        """The last topic quiz is passed or the last lesson is finished"""
+        if not self.topic_ids:
+            return False
+        last_topic_quiz_id = self.topic_quizzes[self.topic_ids[-1]]
+        if last_topic_quiz_id is not None:
+            return self.is_quiz_completed(last_topic_quiz_id)
+        return not self.is_topic_quiz_blocked(self.topic_ids[-1])
+
+
+def get_course_progress(user, course) -> CourseProgress:
+    """Returns the user progress snapshot of the course.
+    The snapshot is kept on the user object, so it lives as long as the request.
+    The views which change the progress reset it with `reset_course_progress`
+    """
+    return get_courses_progress(user, [course.id])[course.id]
+
+
+def get_courses_progress(user, course_ids) -> dict:
+    """Returns {course id: snapshot}, the missing snapshots are loaded together"""
+    if user is None:
+        return CourseProgress.load_many(user, course_ids)
+
+    snapshots = user.__dict__.setdefault('_course_progress', {})
+    missing_course_ids = set(course_ids) - snapshots.keys()
+    if missing_course_ids:
+        snapshots.update(CourseProgress.load_many(user, missing_course_ids))
+    return {course_id: snapshots[course_id] for course_id in course_ids}
+
+
+def reset_course_progress(user) -> None:
+    """Drop the cached snapshots after the user progress was changed"""
+    if user is not None:
+        user.__dict__.pop('_course_progress', None)
@@ -0,0 +1,99 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+VERSION_KEY = 'courses:version:{}'
+RESPONSE_KEY = 'courses:response:{}:{}:{}'
+STATS_KEY = 'courses:response-cache:{}:{}'
+# The entries of the old versions aren't used anymore and expire with the timeout
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60)
+
+
+def _get_version_key(model) -> str:
+    label = model if isinstance(model, str) else model._meta.label
+    return VERSION_KEY.format(label)
+
+
+def get_models_versions(models) -> str:
+    """Current versions of the models. Missing versions are started from the current time,
+    so the entries cached before the version key was evicted aren't used anymore
+    """
+    keys = [_get_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return '-'.join(str(versions[key]) for key in keys)
+
+
+def bump_model_version(model) -> None:
+    """Invalidate all the cached responses which depend on the model"""
+    key = _get_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def _increase_counter(view_name: str, counter: str) -> None:
+    key = STATS_KEY.format(view_name, counter)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_response_cache_stats(view_names) -> dict:
+    """:return {view_name: {'hits': int, 'misses': int}}"""
+    stats = {}
+    for view_name in view_names:
+        stats[view_name] = {
+            counter: cache.get(STATS_KEY.format(view_name, counter), 0) for counter in ('hits', 'misses')
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    """Read-through cache of the GET responses.
+
+    The key contains the view, the query params (including the pagination), the url kwargs
+    and the versions of the `cache_models`. Versions are bumped by the models signals,
+    so the entries are invalidated precisely. The timeout only removes the entries of the old versions
+    """
+    cache_models = ()
+    cache_timeout = CATALOG_CACHE_TIMEOUT
+    cache_anonymous_only = True
+
+    @classmethod
+    def get_cache_name(cls) -> str:
+        return cls.__name__
+
+    def get_response_cache_key(self, request, kwargs) -> str:
+        params = sorted(request.query_params.lists())
+        request_hash = hashlib.md5(f'{request.path}|{params}|{sorted(kwargs.items())}'.encode()).hexdigest()
+        return RESPONSE_KEY.format(self.get_cache_name(), request_hash, get_models_versions(self.cache_models))
+
+    def on_cache_hit(self, request, *args, **kwargs) -> None:
+        """Hook for the side effects of the view which should work for the cached responses too"""
+
+    def get(self, request, *args, **kwargs):
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request, kwargs)
+        data = cache.get(key)
+        if data is not None:
+            _increase_counter(self.get_cache_name(), 'hits')
+            self.on_cache_hit(request, *args, **kwargs)
+            return Response(data)
+
+        _increase_counter(self.get_cache_name(), 'misses')
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
@@ -0,0 +1,89 @@
+import re
+
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Sum, Value, When
+
+from ..models import SearchTerm, Topic, Lesson
+from ...quiz.models import Quiz
+
+TERM_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+TITLE_WEIGHT = 3
+PARENT_WEIGHT = 1
+EXACT_MATCH_BONUS = 2
+
+ObjectType = SearchTerm.ObjectType
+
+# {object type: (model, title field, parent title field)}
+INDEXED_MODELS = {
+    ObjectType.TOPIC: (Topic, 'name', 'course__name'),
+    ObjectType.LESSON: (Lesson, 'name', 'topic__name'),
+    ObjectType.QUIZ: (Quiz, 'title', 'topic__name'),
+}
+
+
+def get_terms(text: str) -> list:
+    return [term[:MAX_TERM_LENGTH] for term in TERM_RE.findall((text or '').lower())]
+
+
+def get_terms_weights(title: str, parent_title: str) -> dict:
+    """:return {term: weight}"""
+    weights = {}
+    for text, weight in ((title, TITLE_WEIGHT), (parent_title, PARENT_WEIGHT)):
+        for term in get_terms(text):
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def build_search_terms(object_type: str, object_id: int, title: str, parent_title: str) -> list:
+    return [
+        SearchTerm(term=term, object_type=object_type, object_id=object_id, weight=weight)
+        for term, weight in get_terms_weights(title, parent_title).items()
+    ]
+
+
+def index_objects(object_type: str, queryset) -> int:
+    """Replace the index entries of the queryset objects.
+    :return count of the indexed objects
+    """
+    model, title_field, parent_title_field = INDEXED_MODELS[object_type]
+    object_ids = []
+    search_terms = []
+    for object_id, title, parent_title in queryset.order_by().values_list('id', title_field, parent_title_field):
+        object_ids.append(object_id)
+        search_terms += build_search_terms(object_type, object_id, title, parent_title)
+
+    remove_objects(object_type, object_ids)
+    SearchTerm.objects.bulk_create(search_terms, batch_size=1000)
+    return len(object_ids)
+
+
+def remove_objects(object_type: str, object_ids) -> None:
+    SearchTerm.objects.filter(object_type=object_type, object_id__in=list(object_ids)).delete()
+
+
+def get_term_score(object_type: str, term: str):
+    """Score of the outer query object by the term, for the objects having the term as a word prefix"""
+    return SearchTerm.objects.filter(
+        object_type=object_type, term__startswith=term, object_id=OuterRef('id')
+    ).order_by().values('object_id').annotate(score=Sum(Case(
+        When(term=term, then='weight'), default=0, output_field=IntegerField()
+    )) * EXACT_MATCH_BONUS + Sum('weight')).values('score')
+
+
+def filter_by_search(queryset, object_type: str, query: str):
+    """Filter the queryset by the objects containing all the query terms (as words prefixes)
+    and order it from the most to the least relevant. The relevance is computed by the database,
+    so the results are paged by the database too, without a limit of the found objects
+    """
+    terms = set(get_terms(query))
+    if not terms:
+        return queryset.none()
+
+    # The outer query drops the duplicates of the joined querysets without DISTINCT
+    queryset = queryset.model.objects.filter(id__in=queryset.values('id'))
+    relevance = Value(0, output_field=IntegerField())
+    for term in sorted(terms):
+        queryset = queryset.filter(id__in=SearchTerm.objects.filter(
+            object_type=object_type, term__startswith=term).values('object_id'))
+        relevance = relevance + Subquery(get_term_score(object_type, term), output_field=IntegerField())
+    return queryset.annotate(search_relevance=relevance).order_by('-search_relevance', 'id')
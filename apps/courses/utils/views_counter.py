@@ -0,0 +1,80 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+from ..models import Course
+
+logger = logging.getLogger(__name__)
+
+
+class CourseViewsCounter:
+    """Buffers the courses views in the process memory.
+
+    The views are written by a background thread every `flush_interval` seconds
+    with one UPDATE for all the buffered courses, so the detail page
+    doesn't lock the course row on every request
+    """
+
+    def __init__(self, flush_interval: int = 30):
+        self.flush_interval = flush_interval
+        self._buffer = Counter()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, course_id: int, count: int = 1) -> None:
+        with self._lock:
+            self._buffer[course_id] += count
+            if self._flusher is None:
+                self._start_flusher()
+
+    def get_pending(self, course_id: int) -> int:
+        """Views which were not written to the database yet"""
+        with self._lock:
+            return self._buffer.get(course_id, 0)
+
+    def flush(self) -> int:
+        """Write the buffered views with one grouped UPDATE.
+        :return count of the updated courses
+        """
+        with self._lock:
+            buffer, self._buffer = self._buffer, Counter()
+        if not buffer:
+            return 0
+
+        try:
+            return Course.objects.filter(id__in=buffer.keys()).update(views=F('views') + Case(
+                *[When(id=course_id, then=Value(count)) for course_id, count in buffer.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+        except Exception:
+            # Keep the views to write them with the next flush
+            with self._lock:
+                self._buffer.update(buffer)
+            raise
+
+    def _start_flusher(self) -> None:
+        self._flusher = threading.Thread(target=self._run_flusher, name='course-views-flusher', daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            # The thread keeps its connection between the flushes, the dropped one is reopened
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to write the buffered courses views')
+
+
+course_views_counter = CourseViewsCounter(
+    flush_interval=getattr(settings, 'COURSE_VIEWS_FLUSH_INTERVAL', 30)
+)
+atexit.register(course_views_counter.flush)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Quiz, Question, Answer, QuizTaker, UsersAnswer
+from .models import Quiz, Question, Answer, QuizTaker, UsersAnswer, QuizStats, QuizScoreBucket, QuestionStats
 import nested_admin
 
 
@@ -53,8 +53,47 @@ class QuizTakerAdmin(admin.ModelAdmin):
     list_filter = ('completed', 'date_created')
 
 
+class QuizScoreBucketInline(admin.TabularInline):
+    model = QuizScoreBucket
+    readonly_fields = ('bucket', 'min_score', 'max_score', 'count')
+    fields = readonly_fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class QuestionStatsInline(admin.TabularInline):
+    model = QuestionStats
+    readonly_fields = ('question', 'answers_count', 'correct_count', 'correct_rate')
+    fields = readonly_fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class QuizStatsAdmin(admin.ModelAdmin):
+    """Read only, the statistics are updated on submit and by the `rebuild_quiz_stats` command"""
+    inlines = [QuizScoreBucketInline, QuestionStatsInline]
+    list_display = ('quiz', 'attempts_count', 'pass_rate', 'average_score', 'average_duration', 'updated_at')
+    readonly_fields = ('quiz', 'attempts_count', 'passed_count', 'pass_rate', 'average_score',
+                       'timed_attempts_count', 'average_duration', 'updated_at')
+    exclude = ('total_score', 'total_duration')
+    search_fields = ('quiz__title',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Quiz, QuizAdmin)
 admin.site.register(Question, QuestionAdmin)
 admin.site.register(Answer, AnswerAdmin)
 admin.site.register(QuizTaker, QuizTakerAdmin)
 admin.site.register(UsersAnswer, UsersAnswerAdmin)
+admin.site.register(QuizStats, QuizStatsAdmin)
@@ -13,3 +13,11 @@ class IsQuizTakerAvailable(permissions.BasePermission):
 
     def has_object_permission(self, request, view, quiz):
         return not request.user.quiz_takers.filter(quiz=quiz).last().is_blocked
+
+
+class IsQuizStatsAvailable(permissions.BasePermission):
+    """The leaderboard has the names of the takers, it's shown to the staff and to the takers of the quiz"""
+    message = "Quiz statistics are available to the quiz takers"
+
+    def has_object_permission(self, request, view, quiz):
+        return request.user.is_staff or request.user.quiz_takers.filter(quiz=quiz).exists()
@@ -6,8 +6,28 @@ from ...models import (
     QuizTaker,
     Question,
     Answer,
-    UsersAnswer
+    UsersAnswer,
+    QuizStats,
+    QuizScoreBucket,
+    QuestionStats,
 )
+from ...utils.answers import get_answers_status
+from ...utils.blocking import get_quizzes_blocked
+from ...utils.sampling import get_taker_questions
+
+
+class AnswersStatusMixin:
+    """Reads the answers status of the user quiz attempt from the serializer context.
+    Views put it to the context as {'answers_status': {quiz id: AnswersStatus}},
+    otherwise it is loaded once per quiz and kept in the context for the other items
+    """
+
+    def get_answers_status(self, quiz_id: int):
+        answers_status = self.context.setdefault('answers_status', {})
+        if quiz_id not in answers_status:
+            quiz_taker = QuizTaker.objects.filter(user=self.context['request'].user, quiz_id=quiz_id).last()
+            answers_status[quiz_id] = get_answers_status(quiz_taker)
+        return answers_status[quiz_id]
 
 
 class QuizListSerializer(serializers.ModelSerializer):
@@ -31,7 +51,7 @@ class QuizShortInfoSerializer(serializers.ModelSerializer):
         return obj.is_completed(self.context['request'].user)
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(AnswersStatusMixin, serializers.ModelSerializer):
     status = serializers.SerializerMethodField()
 
     class Meta:
@@ -39,10 +59,8 @@ class AnswerSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'status']
 
     def get_status(self, answer):
-        return UsersAnswer.objects.filter(
-            quiz_taker__user=self.context['request'].user,
-            answers__in=[answer]
-        ).exists()
+        """Is the answer selected in the user quiz attempt"""
+        return answer.id in self.get_answers_status(answer.question.quiz_id).selected_answer_ids
 
 
 class QuestionSerializer(serializers.ModelSerializer):
@@ -57,7 +75,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         return question.get_technique_name(question.technique)
 
 
-class UserQuestionSerializer(QuestionSerializer):
+class UserQuestionSerializer(AnswersStatusMixin, QuestionSerializer):
     status = serializers.SerializerMethodField()
     answers = AnswerSerializer(many=True, read_only=True)
 
@@ -67,11 +85,7 @@ class UserQuestionSerializer(QuestionSerializer):
 
     def get_status(self, question):
         """Is the question completed by user"""
-        return UsersAnswer.objects.filter(
-            quiz_taker__user=self.context['request'].user,
-            question=question,
-            answers__isnull=False
-        ).exists()
+        return question.id in self.get_answers_status(question.quiz_id).answered_question_ids
 
 
 class UsersAnswerSerializer(serializers.ModelSerializer):
@@ -92,19 +106,37 @@ class UncompletedQuizListSerializer(serializers.ModelSerializer):
         model = Quiz
         fields = ('id', 'title', 'time', 'topic', 'questions_count', 'chances')
 
+    def get_quiz_taker(self, quiz):
+        """The last uncompleted taker of the quiz. The takers of all quizzes are loaded once and kept in the context"""
+        if 'uncompleted_quiz_takers' not in self.context:
+            quiz_takers = QuizTaker.objects.filter(
+                user=self.context['request'].user, completed=False
+            ).select_related('quiz').order_by('id')
+            self.context['uncompleted_quiz_takers'] = {quiz_taker.quiz_id: quiz_taker for quiz_taker in quiz_takers}
+        return self.context['uncompleted_quiz_takers'].get(quiz.id)
+
     def get_time(self, quiz):
-        try:
-            return quiz.takers.filter(user=self.context['request'].user, completed=False).last().time_left
-        except:
+        quiz_taker = self.get_quiz_taker(quiz)
+        if quiz_taker is None:
             raise serializers.ValidationError('Quiz has not been started or has already been completed')
+        return quiz_taker.time_left
 
     def get_chances(self, quiz):
         return {
             'total_chances': quiz.chances,
-            'your_chances': quiz.takers.filter(user=self.context['request'].user, completed=False).last().chances_left
+            'your_chances': self.get_quiz_taker(quiz).available_chances
         }
 
 
+class MyQuizListPageSerializer(serializers.ListSerializer):
+    """Blocked flags of the whole page are computed at once"""
+
+    def to_representation(self, data):
+        quizzes = list(data.all() if hasattr(data, 'all') else data)
+        self.child.blocked_quizzes = get_quizzes_blocked(self.context['request'].user, quizzes)
+        return super().to_representation(quizzes)
+
+
 class MyQuizListSerializer(serializers.ModelSerializer):
     completed = serializers.SerializerMethodField()
     progress = serializers.SerializerMethodField()
@@ -117,6 +149,9 @@ class MyQuizListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'topic', 'questions_count', 'duration', 'required_score_to_pass', 'slug',
                   'completed', 'progress', 'questions_count', 'score', 'is_blocked']
         read_only_fields = ['completed', 'progress', 'questions_count', 'score']
+        list_serializer_class = MyQuizListPageSerializer
+
+    blocked_quizzes = None
 
     def get_completed(self, obj):
         return obj.is_completed(self.context['request'].user)
@@ -125,15 +160,16 @@ class MyQuizListSerializer(serializers.ModelSerializer):
         try:
             quiztaker = QuizTaker.objects.get(user=self.context['request'].user, quiz=obj)
             if not quiztaker.completed:
-                questions_answered = UsersAnswer.objects.filter(quiz_taker=quiztaker, answer__isnull=False).count()
-                total_questions = obj.questions.all().count()
-                return int(questions_answered / total_questions)
+                # Only the questions drawn for the taker
+                questions_answered = quiztaker.answers.filter(answers__isnull=False).distinct().count()
+                total_questions = quiztaker.answers.count()
+                return int(questions_answered / total_questions * 100)
             return None
         except:
             return None
 
     def get_questions_count(self, obj):
-        return obj.questions.all().count()
+        return obj.get_questions_count()
 
     def get_score(self, obj):
         try:
@@ -145,7 +181,9 @@ class MyQuizListSerializer(serializers.ModelSerializer):
             return None
 
     def get_is_blocked(self, quiz):
-        return quiz.is_blocked_for_user(self.context['request'].user)
+        if self.blocked_quizzes is None or quiz.id not in self.blocked_quizzes:
+            return quiz.is_blocked_for_user(self.context['request'].user)
+        return self.blocked_quizzes[quiz.id]
 
 
 class QuizTakerSerializer(serializers.ModelSerializer):
@@ -156,9 +194,18 @@ class QuizTakerSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class QuizDetailSerializer(serializers.ModelSerializer):
+class TakerQuestionsMixin:
+    """Renders the questions drawn for the user taker, or all the questions if the quiz wasn't started"""
+
+    def get_questions(self, quiz):
+        quiz_taker = QuizTaker.objects.filter(user=self.context['request'].user, quiz=quiz).last()
+        questions = get_taker_questions(quiz_taker) if quiz_taker else quiz.questions.all()
+        return QuestionSerializer(questions.prefetch_related('answers'), many=True, context=self.context).data
+
+
+class QuizDetailSerializer(TakerQuestionsMixin, serializers.ModelSerializer):
     takers = serializers.SerializerMethodField()
-    questions = QuestionSerializer(many=True)
+    questions = serializers.SerializerMethodField()
 
     class Meta:
         model = Quiz
@@ -173,9 +220,9 @@ class QuizDetailSerializer(serializers.ModelSerializer):
             return None
 
 
-class QuizResultSerializer(serializers.ModelSerializer):
+class QuizResultSerializer(TakerQuestionsMixin, serializers.ModelSerializer):
     takers = serializers.SerializerMethodField()
-    questions = QuestionSerializer(many=True)
+    questions = serializers.SerializerMethodField()
 
     class Meta:
         model = Quiz
@@ -196,4 +243,41 @@ class CourseCertificateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CourseCertificate
-        fields = ('id', 'name', 'pdf', 'finished_date')
+        fields = ('id', 'name', 'pdf', 'status', 'finished_date')
+
+
+class QuizScoreBucketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuizScoreBucket
+        fields = ('min_score', 'max_score', 'count')
+
+
+class QuestionStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuestionStats
+        fields = ('question', 'answers_count', 'correct_count', 'correct_rate')
+
+
+class QuizStatsSerializer(serializers.ModelSerializer):
+    score_histogram = QuizScoreBucketSerializer(source='score_buckets', many=True)
+    questions = QuestionStatsSerializer(many=True)
+
+    class Meta:
+        model = QuizStats
+        fields = ('quiz', 'attempts_count', 'passed_count', 'pass_rate', 'average_score', 'average_duration',
+                  'score_histogram', 'questions', 'updated_at')
+
+
+class QuizLeaderSerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizTaker
+        fields = ('name', 'score', 'date_created')
+
+    def get_name(self, quiz_taker):
+        """Name without the contacts of the user, which `Profile.get_full_name` may return"""
+        profile = getattr(quiz_taker.user, 'profile', None)
+        if profile is None:
+            return ''
+        return f'{profile.first_name} {profile.last_name}'.strip()
@@ -9,5 +9,7 @@ urlpatterns = [
 	path('quizzes/my/<slug:slug>/questions/', views.UserUncompletedQuizDetailQuestionsView.as_view()),
 	path('quizzes/<slug:slug>/', views.QuizDetailView.as_view()),  # start
 	path('save-answer/', views.SaveUsersAnswerView.as_view()),
+	path('quizzes/<slug:slug>/save-answers/', views.SaveUsersAnswersView.as_view()),
 	path('quizzes/<slug:slug>/submit/', views.SubmitQuizView.as_view()),
+	path('quizzes/<slug:slug>/stats/', views.QuizStatsView.as_view()),
 ]
@@ -1,18 +1,25 @@
-from django.db.models import Q
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils import timezone as django_timezone
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 
-from .permissions import IsAvailableForQuiz, IsQuizTakerAvailable
+from .permissions import IsAvailableForQuiz, IsQuizStatsAvailable, IsQuizTakerAvailable
 from ...services import get_certificate
-from ...utils.answers import get_user_correct_answers_count
+from ...utils.answers import get_answers_status, grade_quiz_taker, save_users_answers
+from ...utils.definitions import get_quiz_definition
+from ...utils.sampling import draw_questions, generate_seed, get_taker_questions
+from ...utils.stats import get_leaderboard, record_quiz_result
 from ....core.utils.apiviews import PaginationListAPIView
+from ....courses.utils.progress import reset_course_progress
+from ....courses.utils.search import ObjectType, filter_by_search
 from ...models import (
     Quiz,
     Question,
     Answer,
     QuizTaker,
     UsersAnswer,
+    QuizStats,
 )
 from .serializers import (
     MyQuizListSerializer,
@@ -22,7 +29,9 @@ from .serializers import (
     UsersAnswerSerializer,
     UncompletedQuizListSerializer,
     UserQuestionSerializer,
-    CourseCertificateSerializer
+    CourseCertificateSerializer,
+    QuizLeaderSerializer,
+    QuizStatsSerializer,
 )
 from ....profiles.models import Notification
 
@@ -38,7 +47,7 @@ class AllQuizListView(generics.ListAPIView):
         queryset = Quiz.objects.all()
         query = self.request.GET.get("q")
         if query:
-            queryset = queryset.filter(Q(title__icontains=query) | Q(topic__name__icontains=query)).distinct()
+            queryset = filter_by_search(queryset, ObjectType.QUIZ, query)
         return queryset
 
     def list(self, request, *args, **kwargs):
@@ -63,7 +72,7 @@ class UserCompletedQuizListView(generics.ListAPIView):
         queryset = Quiz.objects.filter(takers__user=self.request.user)
         query = self.request.GET.get("q")
         if query:
-            queryset = queryset.filter(Q(title__icontains=query) | Q(topic__name__icontains=query)).distinct()
+            queryset = filter_by_search(queryset, ObjectType.QUIZ, query)
         return queryset
 
     def list(self, request, *args, **kwargs):
@@ -89,7 +98,7 @@ class UserUnCompletedQuizListView(generics.ListAPIView):
         query = self.request.GET.get("q")
 
         if query:
-            queryset = queryset.filter(Q(title__icontains=query) | Q(topic__name__icontains=query)).distinct()
+            queryset = filter_by_search(queryset, ObjectType.QUIZ, query)
         return queryset
 
     def list(self, request, *args, **kwargs):
@@ -115,7 +124,7 @@ class UserUncompletedQuizDetailView(generics.RetrieveAPIView):
         query = self.request.GET.get("q")
 
         if query:
-            queryset = queryset.filter(Q(title__icontains=query) | Q(topic__name__icontains=query)).distinct()
+            queryset = filter_by_search(queryset, ObjectType.QUIZ, query)
         return queryset
 
     def retrieve(self, request, *args, **kwargs):
@@ -135,7 +144,22 @@ class UserUncompletedQuizDetailQuestionsView(PaginationListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self, *args, **kwargs):
-        return get_object_or_404(Quiz, slug=self.kwargs["slug"]).questions.all()
+        return get_taker_questions(self.get_quiz_taker()).prefetch_related('answers')
+
+    def get_quiz(self):
+        if not hasattr(self, '_quiz'):
+            self._quiz = get_object_or_404(Quiz, slug=self.kwargs["slug"])
+        return self._quiz
+
+    def get_quiz_taker(self):
+        if not hasattr(self, '_quiz_taker'):
+            self._quiz_taker = QuizTaker.objects.filter(user=self.request.user, quiz=self.get_quiz()).last()
+        return self._quiz_taker
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['answers_status'] = {self.get_quiz().id: get_answers_status(self.get_quiz_taker())}
+        return context
 
 
 class QuizDetailView(generics.RetrieveAPIView):
@@ -144,27 +168,41 @@ class QuizDetailView(generics.RetrieveAPIView):
     lookup_field = 'slug'
     serializer_class = QuizDetailSerializer
     permission_classes = (permissions.IsAuthenticated, IsAvailableForQuiz)
+    quiz_taker = None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.quiz_taker is not None:
+            context['answers_status'] = {self.quiz_taker.quiz_id: get_answers_status(self.quiz_taker)}
+        return context
 
     def get(self, *args, **kwargs):
         """User Question larga bergan javoblari..."""
         quiz = self.get_object()
         last_question = None
-        obj, created = QuizTaker.objects.get_or_create(user=self.request.user, quiz=quiz)
-        if created:
-            for question in Question.objects.filter(quiz=quiz):
-                UsersAnswer.objects.create(quiz_taker=obj, question=question)
-        else:
-            last_question = UsersAnswer.objects.filter(quiz_taker=obj, answers__isnull=False)
-            if last_question.count() > 0:
-                last_question = last_question.last().question.id
-            else:
-                last_question = None
+        with transaction.atomic():
+            obj, created = QuizTaker.objects.get_or_create(
+                user=self.request.user, quiz=quiz, defaults={'seed': generate_seed()})
+            if created:
+                # The drawn questions are kept as the taker answers, created in the drawn order
+                question_ids = draw_questions(
+                    get_quiz_definition(quiz.id), quiz.questions_to_draw, quiz.stratify_by_technique, obj.seed)
+                UsersAnswer.objects.bulk_create([
+                    UsersAnswer(quiz_taker=obj, question_id=question_id) for question_id in question_ids
+                ])
+        if not created:
+            last_question = UsersAnswer.objects.filter(
+                quiz_taker=obj, answers__isnull=False
+            ).order_by('-id').values_list('question_id', flat=True).first()
+        if not obj.deadline:
+            obj.start_attempt()
+        self.quiz_taker = obj
 
         return Response(
             {
                 'status': True,
                 'code': 900,
-                'quiz': self.get_serializer(quiz, context={'request': self.request}).data,
+                'quiz': self.get_serializer(quiz, context=self.get_serializer_context()).data,
                 'last_question_id': last_question
              }
         )
@@ -178,6 +216,8 @@ class SaveUsersAnswerView(generics.UpdateAPIView):
         question = get_object_or_404(Question, id=request.GET.get('question', ''))
         self.check_object_permissions(self.request, question.quiz)
         quiztaker = request.user.profile.get_last_quiztaker(quiz=question.quiz)
+        if quiztaker.is_attempt_expired:
+            return Response({'status': False, 'code': 904, 'error': 'Quiz attempt has expired'})
 
         user_answer = get_object_or_404(UsersAnswer, quiz_taker=quiztaker, question=question)
         user_answer.clear()
@@ -195,6 +235,48 @@ class SaveUsersAnswerView(generics.UpdateAPIView):
         return Response({'status': True, 'code': 900, 'message': 'Answered to question of the quiz'})
 
 
+class SaveUsersAnswersView(generics.GenericAPIView):
+    """Save the answers of many questions with one request.
+    Body: {"answers": [{"question": 1, "answers": [2, 3]}, ...]}
+    """
+    permission_classes = (permissions.IsAuthenticated, IsAvailableForQuiz, IsQuizTakerAvailable)
+
+    def post(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, slug=self.kwargs['slug'])
+        self.check_object_permissions(self.request, quiz)
+        quiztaker = request.user.profile.get_last_quiztaker(quiz=quiz)
+        if quiztaker.is_attempt_expired:
+            return Response({'success': False, 'code': 904, 'error': 'Quiz attempt has expired'})
+
+        try:
+            answers = {item['question']: item.get('answers') or [] for item in request.data.get('answers', [])}
+            saved_count = save_users_answers(quiztaker, answers)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return Response({'success': False, 'code': 903, 'error': e.args})
+
+        return Response({'success': True, 'code': 902, 'saved_questions_count': saved_count})
+
+
+class QuizStatsView(generics.GenericAPIView):
+    """Precomputed statistics and the leaderboard of the quiz"""
+    permission_classes = (permissions.IsAuthenticated, IsQuizStatsAvailable)
+
+    def get(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, slug=self.kwargs['slug'])
+        self.check_object_permissions(self.request, quiz)
+        try:
+            stats = QuizStats.objects.prefetch_related('score_buckets', 'questions').get(quiz=quiz)
+        except QuizStats.DoesNotExist:
+            return Response({'success': False, 'code': 911, 'error': 'Quiz has not been submitted yet'})
+
+        return Response({
+            'success': True,
+            'code': 910,
+            'stats': QuizStatsSerializer(stats).data,
+            'leaderboard': QuizLeaderSerializer(get_leaderboard(quiz), many=True).data,
+        })
+
+
 class SubmitQuizView(generics.GenericAPIView):
     serializer_class = QuizResultSerializer
     permission_classes = (permissions.IsAuthenticated, IsAvailableForQuiz, IsQuizTakerAvailable)
@@ -208,14 +290,34 @@ class SubmitQuizView(generics.GenericAPIView):
         except:
             return Response({'success': False, 'code': 901, 'error': 'Quiz was not started'})
 
+        if quiztaker.is_attempt_expired:
+            return Response({'success': False, 'code': 904, 'error': 'Quiz attempt has expired'})
+        quiztaker.restore_chances()
+
         response = {'status': True, 'code': 901}
 
-        correct_answers = get_user_correct_answers_count(quiztaker)
-        quiztaker.score = int((correct_answers / quiztaker.quiz.questions.count()) * 100)
+        result = grade_quiz_taker(quiztaker)
+        quiztaker.score = result.score
+        response['result'] = {
+            'correct_answers_count': result.correct_answers_count,
+            'questions_count': result.questions_count,
+            'questions': [
+                {'question': question.question_id, 'is_correct': question.is_correct}
+                for question in result.questions
+            ],
+        }
+        record_quiz_result(
+            quiztaker, result,
+            duration=int((django_timezone.now() - quiztaker.started_at).total_seconds())
+            if quiztaker.started_at else None
+        )
+        quiztaker.end_attempt()
 
         if not quiztaker.completed and quiztaker.score >= quiz.required_score_to_pass:
             quiztaker.completed = True
             quiztaker.save()
+            # The certificates are requested by the progress with the completed quiz
+            reset_course_progress(request.user)
             Notification.objects.create(
                 profile=request.user.profile,
                 title=f'Tabriklaymiz!!! Siz muvaffaqiyatli {quiz.course_object.name} kursini tugatdingiz'
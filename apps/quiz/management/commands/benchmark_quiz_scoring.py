@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ...models import Quiz, Question, Answer, QuizTaker, UsersAnswer
+from ...utils.answers import grade_quiz_taker
+from ....accounts.models import User
+
+
+def get_correct_answers_count_by_loop(quiz_taker: QuizTaker) -> int:
+    """The previous scoring: a loop over the users answers with a count query per question"""
+    correct_answers_count = 0
+    for user_answer in quiz_taker.answers.prefetch_related('answers'):
+        is_correct = True
+        selected_answers = user_answer.answers.all()
+        for answer in selected_answers:
+            if not answer.is_correct:
+                is_correct = False
+                break
+
+        if is_correct and selected_answers.count() > 0:
+            correct_answers_count += 1
+    return correct_answers_count
+
+
+class Command(BaseCommand):
+    help = 'Compare the set based quiz scoring with the previous loop on a generated quiz. ' \
+           'The generated data is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=500)
+        parser.add_argument('--answers', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            quiz_taker = self.generate(options['questions'], options['answers'])
+            for name, grade in (
+                ('loop', get_correct_answers_count_by_loop),
+                ('sets', lambda taker: grade_quiz_taker(taker).correct_answers_count),
+            ):
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(options['repeat']):
+                        correct_answers_count = grade(quiz_taker)
+                elapsed = (time.perf_counter() - started) * 1000 / options['repeat']
+                self.stdout.write(
+                    f'{name}: {elapsed:.1f} ms, {len(queries) // options["repeat"]} queries, '
+                    f'{correct_answers_count} correct'
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def generate(questions_count: int, answers_count: int) -> QuizTaker:
+        user = User.objects.first()
+        quiz = Quiz.objects.create(title='Scoring benchmark', slug='scoring-benchmark')
+        Question.objects.bulk_create([
+            Question(quiz=quiz, title=f'Question {index}', technique=index % 3)
+            for index in range(questions_count)
+        ])
+        questions = list(quiz.questions.all())
+        Answer.objects.bulk_create([
+            Answer(question=question, title=f'Answer {index}', is_correct=index == 0)
+            for question in questions for index in range(answers_count)
+        ])
+
+        quiz_taker = QuizTaker.objects.create(user=user, quiz=quiz)
+        UsersAnswer.objects.bulk_create([UsersAnswer(quiz_taker=quiz_taker, question=question) for question in questions])
+        users_answers = {users_answer.question_id: users_answer for users_answer in quiz_taker.answers.all()}
+        UsersAnswer.answers.through.objects.bulk_create([
+            UsersAnswer.answers.through(usersanswer_id=users_answers[answer.question_id].id, answer_id=answer.id)
+            for answer in Answer.objects.filter(question__quiz=quiz) if answer.id % 2
+        ])
+        return quiz_taker
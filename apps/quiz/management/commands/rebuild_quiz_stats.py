@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ...utils.stats import rebuild_quiz_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the quizzes statistics from the existing quiz takers and their answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quiz_ids',
+                            help='Quiz id, may be repeated. All quizzes by default')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        processed_count = rebuild_quiz_stats(options['quiz_ids'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Statistics rebuilt from {processed_count} quiz takers'))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...utils.attempts import sweep_quiz_takers
+
+
+class Command(BaseCommand):
+    help = 'Expire the overdue quiz attempts and restore the chances of the unlocked quiz takers. ' \
+           'Run it periodically, e.g. by cron, or with --interval'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Repeat the sweep every N seconds. Runs once by default')
+
+    def handle(self, *args, **options):
+        while True:
+            expired_count, restored_count = sweep_quiz_takers()
+            self.stdout.write(f'Expired attempts: {expired_count}, restored takers: {restored_count}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
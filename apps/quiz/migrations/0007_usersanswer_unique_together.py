@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def delete_duplicate_users_answers(apps, schema_editor):
+    """Keep one row of every taker question: the row with the answers, the latest of them"""
+    UsersAnswer = apps.get_model('quiz', 'UsersAnswer')
+    duplicates = UsersAnswer.objects.order_by().values('quiz_taker_id', 'question_id').annotate(
+        rows_count=Count('id')).filter(rows_count__gt=1)
+
+    ids_to_delete = []
+    for duplicate in duplicates.iterator():
+        ids = list(UsersAnswer.objects.filter(
+            quiz_taker_id=duplicate['quiz_taker_id'], question_id=duplicate['question_id']
+        ).annotate(answers_count=Count('answers')).order_by('-answers_count', '-id').values_list('id', flat=True))
+        ids_to_delete.extend(ids[1:])
+
+    for i in range(0, len(ids_to_delete), 500):
+        UsersAnswer.objects.filter(id__in=ids_to_delete[i:i + 500]).delete()
+
+
+class Migration(migrations.Migration):
+    # On PostgreSQL the deleted rows leave deferred foreign key checks, which don't allow
+    # to alter the table in the same transaction
+    atomic = False
+
+    dependencies = [
+        ('quiz', '0006_quiz_certificated_course'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_users_answers, migrations.RunPython.noop, atomic=True),
+        migrations.AlterUniqueTogether(
+            name='usersanswer',
+            unique_together={('quiz_taker', 'question')},
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_usersanswer_unique_together'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='quiztaker',
+            index_together={('quiz', 'score')},
+        ),
+        migrations.CreateModel(
+            name='QuizStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts_count', models.PositiveIntegerField(default=0, verbose_name='Attempts count')),
+                ('passed_count', models.PositiveIntegerField(default=0, verbose_name='Passed attempts count')),
+                ('total_score', models.BigIntegerField(default=0, verbose_name='Total score')),
+                ('timed_attempts_count', models.PositiveIntegerField(default=0, help_text='Attempts with known duration', verbose_name='Timed attempts count')),
+                ('total_duration', models.BigIntegerField(default=0, help_text='In seconds', verbose_name='Total duration')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Updated at')),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='quiz.Quiz', verbose_name='Quiz')),
+            ],
+            options={
+                'verbose_name': 'Quiz Statistics',
+                'verbose_name_plural': 'Quizzes Statistics',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers_count', models.PositiveIntegerField(default=0, verbose_name='Answers count')),
+                ('correct_count', models.PositiveIntegerField(default=0, verbose_name='Correct answers count')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='quiz.Question')),
+                ('stats', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='quiz.QuizStats')),
+            ],
+            options={
+                'verbose_name': 'Question Statistics',
+                'verbose_name_plural': 'Questions Statistics',
+                'ordering': ['question'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizScoreBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField(verbose_name='Bucket')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Attempts count')),
+                ('stats', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='quiz.QuizStats')),
+            ],
+            options={
+                'verbose_name': 'Score Bucket',
+                'verbose_name_plural': 'Score Histogram',
+                'ordering': ['bucket'],
+                'unique_together': {('stats', 'bucket')},
+            },
+        ),
+    ]
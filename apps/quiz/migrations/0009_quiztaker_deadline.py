@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0008_quiz_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiztaker',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Attempt started at'),
+        ),
+        migrations.AddField(
+            model_name='quiztaker',
+            name='deadline',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Empty if there is no attempt in progress', null=True, verbose_name='Attempt deadline'),
+        ),
+        migrations.AlterField(
+            model_name='quiztaker',
+            name='unlock_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Unlock quiz at'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0009_quiztaker_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='questions_to_draw',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Every taker gets this count of random questions. All the questions by default', null=True, verbose_name='Questions to draw'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='stratify_by_technique',
+            field=models.BooleanField(default=False, help_text='Draw the question types in the same proportions as in all the questions', verbose_name='Stratify by question type'),
+        ),
+        migrations.AddField(
+            model_name='quiztaker',
+            name='seed',
+            field=models.PositiveIntegerField(blank=True, help_text='The drawn questions are kept as the taker answers', null=True, verbose_name='Questions draw seed'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import F, Q
+
+
+def fill_submitted_at(apps, schema_editor):
+    """Takers which submitted the quiz at least once, as they were counted by the statistics rebuild"""
+    QuizTaker = apps.get_model('quiz', 'QuizTaker')
+    QuizTaker.objects.filter(
+        Q(completed=True) | Q(score__gt=0) | Q(chances_left__lt=F('quiz__chances'))
+    ).update(submitted_at=F('date_created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0010_quiz_questions_to_draw'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiztaker',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, help_text='The last submitted result is counted in the quiz statistics', null=True, verbose_name='Last submitted at'),
+        ),
+        migrations.AddField(
+            model_name='quiztaker',
+            name='duration',
+            field=models.PositiveIntegerField(blank=True, help_text='In seconds', null=True, verbose_name='Last attempt duration'),
+        ),
+        migrations.AddField(
+            model_name='usersanswer',
+            name='is_correct',
+            field=models.BooleanField(help_text='Result of the last submit, empty if not submitted', null=True, verbose_name='Is correct'),
+        ),
+        migrations.RunPython(fill_submitted_at, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone, timedelta
 
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone as django_timezone
 from django.utils.translation import gettext_lazy as _
@@ -9,6 +9,7 @@ from django.utils.translation import gettext_lazy as _
 from slugify import slugify
 from ..core.models import TimestampedModel
 from ..accounts.models import User
+from ..courses.utils.progress import get_course_progress
 
 
 class Quiz(TimestampedModel):
@@ -30,6 +31,12 @@ class Quiz(TimestampedModel):
     required_score_to_pass = models.IntegerField(
         help_text=_('Required score to pass the quiz (%)'), default=80, verbose_name=_('Required score'))
     chances = models.SmallIntegerField(_('Chances count'), default=5)
+    questions_to_draw = models.PositiveSmallIntegerField(
+        _('Questions to draw'), blank=True, null=True,
+        help_text=_('Every taker gets this count of random questions. All the questions by default'))
+    stratify_by_technique = models.BooleanField(
+        _('Stratify by question type'), default=False,
+        help_text=_('Draw the question types in the same proportions as in all the questions'))
     slug = models.SlugField(max_length=255, blank=True, unique=True)
     date_created = models.DateTimeField(auto_now_add=True)
 
@@ -60,6 +67,8 @@ class Quiz(TimestampedModel):
         return bool(self.certificated_course)
 
     def is_completed(self, user: User) -> bool:
+        if self.topic_id or self.course_id:
+            return get_course_progress(user, self.course_object).is_quiz_completed(self.id)
         try:
             return QuizTaker.objects.get(user=user, quiz=self).completed
         except:
@@ -69,22 +78,8 @@ class Quiz(TimestampedModel):
         return not self.certificated_course.is_completed(user)
 
     def is_blocked_for_user(self, user: User) -> bool:
-        if self.is_for_certificated_course:
-            return self.is_certificated_quiz_blocked(user)
-        elif self.is_final:
-            last_lesson = self.course.topic_courses.last().lessons.last()
-        else:
-            last_lesson = self.topic.lessons.last()
-        if not self.is_final or not Quiz.objects.filter(topic=self.course.topic_courses.last()).exists():
-            # Quiz isn't final or there're no any quizzes except the 'self'
-            # Last lesson in the topic should be finished
-            return not last_lesson.is_lesson_finished(user)
-
-        try:
-            # Last quiz should be passed if the quiz is final
-            return not QuizTaker.objects.get(user=user, quiz=self.course.topic_courses.last().quiz).completed
-        except:
-            return True
+        from .utils.blocking import get_quizzes_blocked
+        return get_quizzes_blocked(user, [self])[self.id]
 
     @property
     def course_object(self):
@@ -95,7 +90,11 @@ class Quiz(TimestampedModel):
         return self.topic.course
 
     def get_questions_count(self):
-        return self.questions.all().count()
+        from .utils.definitions import get_quiz_definition
+        questions_count = get_quiz_definition(self.id).questions_count
+        if self.questions_to_draw:
+            return min(self.questions_to_draw, questions_count)
+        return questions_count
 
 
 class Question(TimestampedModel):
@@ -149,17 +148,33 @@ class QuizTaker(models.Model):
     score = models.IntegerField(default=0, verbose_name=_('Score'))
     completed = models.BooleanField(default=False, verbose_name=_('Completed'))
     chances_left = models.SmallIntegerField(_('Chances left'), default=5)
-    unlock_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Unlock quiz at'))
+    unlock_at = models.DateTimeField(blank=True, null=True, db_index=True, verbose_name=_('Unlock quiz at'))
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Attempt started at'))
+    deadline = models.DateTimeField(
+        blank=True, null=True, db_index=True, verbose_name=_('Attempt deadline'),
+        help_text=_('Empty if there is no attempt in progress'))
+    seed = models.PositiveIntegerField(
+        blank=True, null=True, verbose_name=_('Questions draw seed'),
+        help_text=_('The drawn questions are kept as the taker answers'))
+    submitted_at = models.DateTimeField(
+        blank=True, null=True, verbose_name=_('Last submitted at'),
+        help_text=_('The last submitted result is counted in the quiz statistics'))
+    duration = models.PositiveIntegerField(
+        blank=True, null=True, verbose_name=_('Last attempt duration'), help_text=_('In seconds'))
     date_created = models.DateTimeField(auto_now_add=True, verbose_name=_('Date Created'))
 
+    # Chances given back when the lock time has gone
+    RESTORED_CHANCES = 5
+
     class Meta:
         verbose_name = _('Quiz Taker')
         verbose_name_plural = _('Quiz Takers')
         ordering = ['id']
+        index_together = ('quiz', 'score')
 
     def save(self, *args, **kwargs):
         if self.chances_left == 0:
-            self.unlock_at = datetime.utcnow() + timedelta(days=1)
+            self.unlock_at = django_timezone.now() + timedelta(days=1)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -167,6 +182,9 @@ class QuizTaker(models.Model):
 
     @property
     def time_left(self):
+        if self.deadline:
+            left_seconds = max(int((self.deadline - django_timezone.now()).total_seconds()), 0)
+            return str(timedelta(seconds=left_seconds))
         processing_seconds = (datetime.now(timezone.utc) - self.date_created).total_seconds()
         left_seconds = int(self.quiz.duration * 60 - processing_seconds)
         return str(timedelta(seconds=left_seconds))
@@ -175,18 +193,44 @@ class QuizTaker(models.Model):
     def is_blocked(self) -> bool:
         if not self.unlock_at:
             return False
+        return django_timezone.now() < self.unlock_at
 
-        blocked = django_timezone.now() < self.unlock_at
-        if not blocked:
-            if self.chances_left < 1:
-                # Increase chances if locked time has gone
-                self.increase_chances(5)
-            return False
-        return True
+    @property
+    def is_attempt_expired(self) -> bool:
+        """The attempt deadline has gone, or the attempt was ended by the submit or by the sweeper"""
+        if self.deadline:
+            return self.deadline < django_timezone.now()
+        return bool(self.started_at)
+
+    @property
+    def available_chances(self) -> int:
+        """Chances left, including the chances which are restored when the lock time has gone.
+        The sweeper writes the restored chances, until then they are computed on read
+        """
+        if self.chances_left < 1 and self.unlock_at and not self.is_blocked:
+            return self.chances_left + self.RESTORED_CHANCES
+        return self.chances_left
+
+    def restore_chances(self):
+        """Write the chances restored when the lock time has gone. Takes effect with the next save"""
+        if self.available_chances != self.chances_left:
+            self.chances_left = self.available_chances
+            self.unlock_at = None
+
+    def start_attempt(self):
+        self.started_at = django_timezone.now()
+        self.deadline = self.started_at + timedelta(minutes=self.quiz.duration)
+        self.save(update_fields=('started_at', 'deadline'))
+
+    def end_attempt(self):
+        """Takes effect with the next save"""
+        self.deadline = None
 
     def decrease_chances(self, count: int = 1):
-        self.chances_left -= count
-        self.save(update_fields=('chances_left',))
+        self.chances_left = self.available_chances - count
+        if self.chances_left > 0:
+            self.unlock_at = None
+        self.save(update_fields=('chances_left', 'unlock_at'))
 
     def increase_chances(self, count: int = 1):
         self.chances_left += count
@@ -199,6 +243,11 @@ class UsersAnswer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, verbose_name=_('Question'),
                                  related_name='users_answers')
     answers = models.ManyToManyField(Answer, blank=True, verbose_name=_('Answers'), related_name='users_answers')
+    is_correct = models.BooleanField(
+        null=True, verbose_name=_('Is correct'), help_text=_('Result of the last submit, empty if not submitted'))
+
+    class Meta:
+        unique_together = ('quiz_taker', 'question')
 
     def __str__(self):
         return self.question.title
@@ -211,6 +260,122 @@ class UsersAnswer(models.Model):
         self.answers.clear()
 
 
+class QuizStats(models.Model):
+    """Quiz statistics of the last submitted result of every taker, updated on every submit of the quiz"""
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, related_name='stats', verbose_name=_('Quiz'))
+    attempts_count = models.PositiveIntegerField(_('Attempts count'), default=0)
+    passed_count = models.PositiveIntegerField(_('Passed attempts count'), default=0)
+    total_score = models.BigIntegerField(_('Total score'), default=0)
+    timed_attempts_count = models.PositiveIntegerField(
+        _('Timed attempts count'), default=0, help_text=_('Attempts with known duration'))
+    total_duration = models.BigIntegerField(_('Total duration'), default=0, help_text=_('In seconds'))
+    updated_at = models.DateTimeField(_('Updated at'), default=django_timezone.now)
+
+    class Meta:
+        verbose_name = _('Quiz Statistics')
+        verbose_name_plural = _('Quizzes Statistics')
+        ordering = ['id']
+
+    def __str__(self):
+        return str(self.quiz)
+
+    @property
+    def pass_rate(self) -> int:
+        """Passed attempts in percents"""
+        if not self.attempts_count:
+            return 0
+        return int(self.passed_count / self.attempts_count * 100)
+
+    @property
+    def average_score(self) -> int:
+        if not self.attempts_count:
+            return 0
+        return int(self.total_score / self.attempts_count)
+
+    @property
+    def average_duration(self) -> int:
+        """In seconds"""
+        if not self.timed_attempts_count:
+            return 0
+        return int(self.total_duration / self.timed_attempts_count)
+
+
+class QuizScoreBucket(models.Model):
+    """Attempts count with the score in [bucket * 10, bucket * 10 + 10), the last bucket is 100"""
+    stats = models.ForeignKey(QuizStats, on_delete=models.CASCADE, related_name='score_buckets')
+    bucket = models.PositiveSmallIntegerField(_('Bucket'))
+    count = models.PositiveIntegerField(_('Attempts count'), default=0)
+
+    class Meta:
+        verbose_name = _('Score Bucket')
+        verbose_name_plural = _('Score Histogram')
+        ordering = ['bucket']
+        unique_together = ('stats', 'bucket')
+
+    def __str__(self):
+        return f'{self.min_score}-{self.max_score}'
+
+    @staticmethod
+    def get_bucket(score: int) -> int:
+        return min(max(score, 0), 100) // 10
+
+    @property
+    def min_score(self) -> int:
+        return self.bucket * 10
+
+    @property
+    def max_score(self) -> int:
+        return min(self.bucket * 10 + 9, 100)
+
+
+class QuestionStats(models.Model):
+    stats = models.ForeignKey(QuizStats, on_delete=models.CASCADE, related_name='questions')
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='stats')
+    answers_count = models.PositiveIntegerField(_('Answers count'), default=0)
+    correct_count = models.PositiveIntegerField(_('Correct answers count'), default=0)
+
+    class Meta:
+        verbose_name = _('Question Statistics')
+        verbose_name_plural = _('Questions Statistics')
+        ordering = ['question']
+
+    def __str__(self):
+        return str(self.question)
+
+    @property
+    def correct_rate(self) -> int:
+        """Correct answers in percents"""
+        if not self.answers_count:
+            return 0
+        return int(self.correct_count / self.answers_count * 100)
+
+
 @receiver(pre_save, sender=Quiz)
 def slugify_name(sender, instance, *args, **kwargs):
     instance.slug = slugify(instance.title)
+
+
+@receiver(pre_save, sender=Question)
+@receiver(pre_save, sender=Answer)
+def pre_save_remember_quiz(sender, instance, raw=False, **kwargs):
+    """Remember the quiz the question/answer belonged to, to invalidate it if the object moves"""
+    if raw or not instance.pk:
+        return
+    lookup = 'quiz_id' if sender is Question else 'question__quiz_id'
+    instance._previous_quiz_id = sender.objects.filter(pk=instance.pk).values_list(lookup, flat=True).first()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Answer)
+def post_change_invalidate_quiz_definition(sender, instance, **kwargs):
+    """Drop the cached definition of the quiz, e.g. after saving the QuizAdmin inlines"""
+    from .utils.definitions import invalidate_quiz_definition
+    quiz_ids = {getattr(instance, '_previous_quiz_id', None)}
+    if sender is Question:
+        quiz_ids.add(instance.quiz_id)
+    else:
+        quiz_ids.add(Question.objects.filter(id=instance.question_id).values_list('quiz_id', flat=True).first())
+    for quiz_id in quiz_ids - {None}:
+        invalidate_quiz_definition(quiz_id)
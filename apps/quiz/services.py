@@ -1,15 +1,17 @@
 from ..accounts.models import User
-from ..courses.utils.certificates.certificates import create_certificate
+from ..courses.utils.certificates.jobs import request_certificate
 from .models import Quiz, QuizTaker
 
 
 def get_certificate(quiz: Quiz, user: User, quiztaker: QuizTaker, domain: str):
-    """Create certificates for course and certificated_courses if necessary"""
+    """Request certificates for course and certificated_courses if necessary.
+    The certificates are returned pending, their files are generated by the certificates worker
+    """
     if quiz.is_final:
         course = quiz.course_object
         if course.certificate:
-            return create_certificate(user, domain, course=quiztaker.quiz.course_object)
+            return request_certificate(user, domain, course=quiztaker.quiz.course_object)
 
     if quiz.is_for_certificated_course:
         certificated_course = quiz.certificated_course
-        return create_certificate(user, domain, certificated_course=certificated_course)
+        return request_certificate(user, domain, certificated_course=certificated_course)
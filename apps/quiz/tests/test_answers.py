@@ -0,0 +1,124 @@
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Quiz, Question, Answer, QuizTaker, UsersAnswer
+from ..utils.answers import grade_quiz_taker, is_answer_correct
+from ...accounts.models import User
+
+SINGLE_CHOICE, MULTIPLE_CHOICE, TRUE_FALSE = 0, 1, 2
+
+
+def is_answer_correct_before(selected_answer_ids: frozenset, correct_answer_ids: frozenset) -> bool:
+    """The grading before the answers sets: any selected answers, which are all correct"""
+    return bool(selected_answer_ids) and selected_answer_ids <= correct_answer_ids
+
+
+class IsAnswerCorrectTests(SimpleTestCase):
+
+    def assert_graded(self, technique: int, selected: set, correct: set, expected: bool, same_as_before: bool = True):
+        selected, correct = frozenset(selected), frozenset(correct)
+        self.assertEqual(is_answer_correct(technique, selected, correct), expected)
+        if same_as_before:
+            self.assertEqual(is_answer_correct_before(selected, correct), expected)
+
+    def test_single_choice(self):
+        self.assert_graded(SINGLE_CHOICE, {1}, {1}, True)
+        self.assert_graded(SINGLE_CHOICE, {2}, {1}, False)
+        self.assert_graded(SINGLE_CHOICE, {1, 2}, {1}, False)
+
+    def test_true_false(self):
+        self.assert_graded(TRUE_FALSE, {1}, {1}, True)
+        self.assert_graded(TRUE_FALSE, {2}, {1}, False)
+
+    def test_multiple_choice_exact(self):
+        self.assert_graded(MULTIPLE_CHOICE, {1, 2}, {1, 2}, True)
+
+    def test_multiple_choice_extra(self):
+        self.assert_graded(MULTIPLE_CHOICE, {1, 2, 3}, {1, 2}, False)
+
+    def test_multiple_choice_partial(self):
+        """The partial selection was accepted before, the multiple choice needs all the correct answers now"""
+        self.assert_graded(MULTIPLE_CHOICE, {1}, {1, 2}, False, same_as_before=False)
+        self.assertTrue(is_answer_correct_before(frozenset({1}), frozenset({1, 2})))
+
+    def test_no_answer(self):
+        for technique in (SINGLE_CHOICE, MULTIPLE_CHOICE, TRUE_FALSE):
+            self.assert_graded(technique, set(), {1}, False)
+
+
+class GradeQuizTakerTests(TestCase):
+
+    def setUp(self):
+        self.quiz = Quiz.objects.create(title='Grading quiz')
+        self.user = User.objects.create(phone='+998900000001')
+        self.quiz_taker = QuizTaker.objects.create(user=self.user, quiz=self.quiz)
+
+    def create_question(self, technique: int, correct_flags: list) -> tuple:
+        question = Question.objects.create(quiz=self.quiz, title=f'Question {technique}', technique=technique)
+        answers = [
+            Answer.objects.create(question=question, title=f'Answer {i}', is_correct=is_correct)
+            for i, is_correct in enumerate(correct_flags)
+        ]
+        return question, answers
+
+    def answer(self, question, answers) -> None:
+        users_answer = UsersAnswer.objects.create(quiz_taker=self.quiz_taker, question=question)
+        users_answer.answers.set(answers)
+
+    def test_grades_drawn_questions(self):
+        single, single_answers = self.create_question(SINGLE_CHOICE, [True, False, False])
+        wrong_single, wrong_single_answers = self.create_question(SINGLE_CHOICE, [True, False])
+        exact, exact_answers = self.create_question(MULTIPLE_CHOICE, [True, True, False])
+        extra, extra_answers = self.create_question(MULTIPLE_CHOICE, [True, True, False])
+        partial, partial_answers = self.create_question(MULTIPLE_CHOICE, [True, True, False])
+        true_false, true_false_answers = self.create_question(TRUE_FALSE, [False, True])
+        unanswered, _ = self.create_question(SINGLE_CHOICE, [True, False])
+        self.create_question(SINGLE_CHOICE, [True, False])  # Not drawn for the taker
+
+        self.answer(single, single_answers[:1])
+        self.answer(wrong_single, wrong_single_answers[1:])
+        self.answer(exact, exact_answers[:2])
+        self.answer(extra, extra_answers)
+        self.answer(partial, partial_answers[:1])
+        self.answer(true_false, true_false_answers[1:])
+        self.answer(unanswered, [])
+
+        result = grade_quiz_taker(self.quiz_taker)
+
+        results = {question.question_id: question.is_correct for question in result.questions}
+        self.assertEqual(results, {
+            single.id: True,
+            wrong_single.id: False,
+            exact.id: True,
+            extra.id: False,
+            partial.id: False,
+            true_false.id: True,
+            unanswered.id: False,
+        })
+        self.assertEqual(result.questions_count, 7)
+        self.assertEqual(result.correct_answers_count, 3)
+        self.assertEqual(result.score, 42)
+
+    def test_same_count_as_before_without_partial_selections(self):
+        for technique, flags, selected in (
+            (SINGLE_CHOICE, [True, False], [0]),
+            (SINGLE_CHOICE, [True, False], [1]),
+            (MULTIPLE_CHOICE, [True, True, False], [0, 1]),
+            (MULTIPLE_CHOICE, [True, True, False], [0, 1, 2]),
+            (TRUE_FALSE, [True, False], [0]),
+            (TRUE_FALSE, [True, False], []),
+        ):
+            question, answers = self.create_question(technique, flags)
+            self.answer(question, [answers[i] for i in selected])
+
+        correct_before = 0
+        for users_answer in self.quiz_taker.answers.prefetch_related('answers'):
+            selected = users_answer.answers.all()
+            if selected and all(answer.is_correct for answer in selected):
+                correct_before += 1
+
+        self.assertEqual(grade_quiz_taker(self.quiz_taker).correct_answers_count, correct_before)
+
+    def test_no_questions(self):
+        result = grade_quiz_taker(self.quiz_taker)
+        self.assertEqual(result.questions_count, 0)
+        self.assertEqual(result.score, 0)
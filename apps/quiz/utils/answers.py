@@ -1,17 +1,131 @@
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.db import transaction
+
 from ...quiz.models import QuizTaker, UsersAnswer
+from .definitions import get_quiz_definition
+
+
+class QuestionResult(NamedTuple):
+    question_id: int
+    is_correct: bool
+    selected_answer_ids: frozenset
+    correct_answer_ids: frozenset
+
+
+class QuizResult(NamedTuple):
+    questions: list
+    correct_answers_count: int
+    questions_count: int
+
+    @property
+    def score(self) -> int:
+        """Score in percents"""
+        if not self.questions_count:
+            return 0
+        return int((self.correct_answers_count / self.questions_count) * 100)
+
+
+class AnswersStatus(NamedTuple):
+    selected_answer_ids: frozenset
+    answered_question_ids: frozenset
+
+
+def get_answers_status(quiz_taker) -> AnswersStatus:
+    """Answers selected in the quiz attempt and the questions they answer, with one query"""
+    if quiz_taker is None:
+        return AnswersStatus(frozenset(), frozenset())
+    rows = list(UsersAnswer.answers.through.objects.filter(usersanswer__quiz_taker=quiz_taker).values_list(
+        'usersanswer__question_id', 'answer_id'))
+    return AnswersStatus(
+        selected_answer_ids=frozenset(answer_id for _, answer_id in rows),
+        answered_question_ids=frozenset(question_id for question_id, _ in rows),
+    )
+
+
+def is_answer_correct(technique: int, selected_answer_ids: frozenset, correct_answer_ids: frozenset) -> bool:
+    """Single choice and true/false questions need one selected correct answer,
+    multiple choice questions need exactly all the correct answers
+    """
+    if not selected_answer_ids:
+        return False
+    if technique == 1:  # Multiple Choice
+        return selected_answer_ids == correct_answer_ids
+    return len(selected_answer_ids) == 1 and selected_answer_ids <= correct_answer_ids
+
+
+def grade_answers(definition, selected_answers: dict, question_ids=None) -> QuizResult:
+    """Grade the questions of the quiz definition by comparing the selected and the correct answers sets
+    :param selected_answers: {question id: set of the selected answer ids}
+    :param question_ids: the questions drawn for the taker, all the questions by default
+    """
+    results = []
+    for question in definition.questions:
+        if question_ids is not None and question.id not in question_ids:
+            continue
+        selected_answer_ids = frozenset(selected_answers.get(question.id, ()))
+        results.append(QuestionResult(
+            question_id=question.id,
+            is_correct=is_answer_correct(question.technique, selected_answer_ids, question.correct_answer_ids),
+            selected_answer_ids=selected_answer_ids,
+            correct_answer_ids=question.correct_answer_ids,
+        ))
+
+    return QuizResult(
+        questions=results,
+        correct_answers_count=sum(result.is_correct for result in results),
+        questions_count=len(results),
+    )
+
+
+def grade_quiz_taker(quiz_taker: QuizTaker) -> QuizResult:
+    """Grade the questions drawn for the taker. The correct answers come from the cached quiz definition,
+    the drawn questions with the taker selections are read with one query
+    """
+    selected_answers = defaultdict(set)
+    rows = UsersAnswer.objects.filter(quiz_taker=quiz_taker).values_list('question_id', 'answers__id')
+    for question_id, answer_id in rows:
+        question_answers = selected_answers[question_id]  # The question is drawn even without the answers
+        if answer_id is not None:
+            question_answers.add(answer_id)
+    return grade_answers(get_quiz_definition(quiz_taker.quiz_id), selected_answers, selected_answers.keys())
 
 
 def get_user_correct_answers_count(quiz_taker: QuizTaker):
-    correct_answers_count = 0
-    for user_answer in quiz_taker.answers.prefetch_related('answers'):
-        # Check for valid of every Answer in UserAnswer
-        is_correct = True
-        selected_answers = user_answer.answers.all()
-        for answer in selected_answers:
-            if not answer.is_correct:
-                is_correct = False
-                break
-
-        if is_correct and selected_answers.count() > 0:
-            correct_answers_count += 1
-    return correct_answers_count
+    return grade_quiz_taker(quiz_taker).correct_answers_count
+
+
+def save_users_answers(quiz_taker: QuizTaker, answers: dict) -> int:
+    """Replace the selected answers of many questions at once.
+    Saving the same answers again gives the same result, so the clients can resend them safely.
+    :param answers: {question id: [answer ids]}, an empty list clears the question
+    :return count of the saved questions
+    """
+    answers = {int(question_id): {int(answer_id) for answer_id in answer_ids}
+               for question_id, answer_ids in answers.items()}
+
+    answers_questions = {
+        answer_id: question.id
+        for question in get_quiz_definition(quiz_taker.quiz_id).questions for answer_id in question.answer_ids
+    }
+    for question_id, question_answer_ids in answers.items():
+        for answer_id in question_answer_ids:
+            if answers_questions.get(answer_id) != question_id:
+                raise ValueError(f'Answer {answer_id} does not belong to the question {question_id}')
+
+    users_answers = dict(UsersAnswer.objects.filter(
+        quiz_taker=quiz_taker, question_id__in=answers.keys()
+    ).values_list('question_id', 'id'))
+    for question_id in answers:
+        if question_id not in users_answers:
+            raise ValueError(f'Question {question_id} is not in the quiz')
+
+    through = UsersAnswer.answers.through
+    with transaction.atomic():
+        through.objects.filter(usersanswer_id__in=users_answers.values()).delete()
+        through.objects.bulk_create([
+            through(usersanswer_id=users_answers[question_id], answer_id=answer_id)
+            for question_id, question_answer_ids in answers.items() for answer_id in question_answer_ids
+        ])
+    return len(answers)
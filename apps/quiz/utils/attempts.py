@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import QuizTaker
+
+LOCK_DURATION = timedelta(days=1)
+
+
+def sweep_quiz_takers(now=None) -> tuple:
+    """Write the attempts lifecycle with bulk updates, so the reading endpoints never write:
+    restore the chances of the takers whose lock time has gone,
+    expire the overdue attempts (an uncompleted quiz attempt costs a chance)
+    and lock the takers which have no chances left.
+    :return (expired attempts count, restored takers count)
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        restored_count = QuizTaker.objects.filter(chances_left__lt=1, unlock_at__lte=now).update(
+            chances_left=F('chances_left') + QuizTaker.RESTORED_CHANCES, unlock_at=None)
+
+        overdue = QuizTaker.objects.filter(deadline__lt=now)
+        expired_count = overdue.filter(completed=False).update(deadline=None, chances_left=F('chances_left') - 1)
+        expired_count += overdue.filter(completed=True).update(deadline=None)
+
+        QuizTaker.objects.filter(chances_left__lt=1, unlock_at__isnull=True).update(unlock_at=now + LOCK_DURATION)
+    return expired_count, restored_count
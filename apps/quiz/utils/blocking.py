@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from ...courses.models import CertificatedCourse, Topic
+from ...courses.utils.progress import get_courses_progress
+
+
+def get_quizzes_blocked(user, quizzes) -> dict:
+    """Blocked flags of many quizzes for the user, with the same rules as `Quiz.is_blocked_for_user`.
+    Reads the topics courses and the certificated courses sub courses with one query each,
+    then the progress of all the related courses together
+    :return {quiz id: bool}
+    """
+    quizzes = list(quizzes)
+    topic_ids = {quiz.topic_id for quiz in quizzes if quiz.topic_id}
+    certificated_course_ids = {quiz.certificated_course_id for quiz in quizzes if quiz.certificated_course_id}
+
+    topic_courses = {}
+    if topic_ids:
+        topic_courses = dict(Topic.objects.filter(id__in=topic_ids).values_list('id', 'course_id'))
+    sub_courses = defaultdict(list)
+    if certificated_course_ids:
+        rows = CertificatedCourse.sub_courses.through.objects.filter(
+            certificatedcourse_id__in=certificated_course_ids
+        ).values_list('certificatedcourse_id', 'course_id')
+        for certificated_course_id, course_id in rows:
+            sub_courses[certificated_course_id].append(course_id)
+
+    course_ids = set(topic_courses.values())
+    course_ids.update(quiz.course_id for quiz in quizzes if quiz.course_id)
+    course_ids.update(course_id for sub_course_ids in sub_courses.values() for course_id in sub_course_ids)
+    progress = get_courses_progress(user, course_ids)
+
+    blocked = {}
+    for quiz in quizzes:
+        if quiz.certificated_course_id:
+            # All the sub courses should be completed
+            sub_course_ids = sub_courses[quiz.certificated_course_id]
+            blocked[quiz.id] = not sub_course_ids or not all(
+                progress[course_id].is_completed() for course_id in sub_course_ids)
+        elif quiz.course_id:
+            # Last quiz should be passed if the quiz is final
+            blocked[quiz.id] = progress[quiz.course_id].is_final_quiz_blocked()
+        elif quiz.topic_id:
+            # Last lesson in the topic should be finished
+            blocked[quiz.id] = progress[topic_courses[quiz.topic_id]].is_topic_quiz_blocked(quiz.topic_id)
+        else:
+            blocked[quiz.id] = False
+    return blocked
@@ -0,0 +1,91 @@
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import Question
+
+VERSION_KEY = 'quiz:definition-version:{}'
+DEFINITION_KEY = 'quiz:definition:{}:{}'
+DEFINITION_TIMEOUT = getattr(settings, 'QUIZ_DEFINITION_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+class QuestionDefinition(NamedTuple):
+    id: int
+    technique: int
+    answer_ids: tuple
+    correct_answer_ids: frozenset
+
+
+class QuizDefinition(NamedTuple):
+    quiz_id: int
+    version: int
+    questions: tuple
+
+    @property
+    def question_ids(self) -> list:
+        return [question.id for question in self.questions]
+
+    @property
+    def questions_count(self) -> int:
+        return len(self.questions)
+
+    def get_question(self, question_id: int):
+        for question in self.questions:
+            if question.id == question_id:
+                return question
+        return None
+
+
+def get_quiz_definition_version(quiz_id: int) -> int:
+    """Missing versions are started from the current time,
+    so the definitions cached before the version was evicted aren't used anymore
+    """
+    key = VERSION_KEY.format(quiz_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_quiz_definition(quiz_id: int) -> None:
+    key = VERSION_KEY.format(quiz_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def build_quiz_definition(quiz_id: int, version: int = 0) -> QuizDefinition:
+    """Read the questions and the answers of the quiz with one query"""
+    questions = {}
+    rows = Question.objects.filter(quiz_id=quiz_id).order_by('id', 'answers__id').values_list(
+        'id', 'technique', 'answers__id', 'answers__is_correct')
+    for question_id, technique, answer_id, is_correct in rows:
+        _, answer_ids, correct_answer_ids = questions.setdefault(question_id, (technique, [], set()))
+        if answer_id is not None:
+            answer_ids.append(answer_id)
+            if is_correct:
+                correct_answer_ids.add(answer_id)
+
+    return QuizDefinition(
+        quiz_id=quiz_id,
+        version=version,
+        questions=tuple(
+            QuestionDefinition(question_id, technique, tuple(answer_ids), frozenset(correct_answer_ids))
+            for question_id, (technique, answer_ids, correct_answer_ids) in questions.items()
+        ),
+    )
+
+
+def get_quiz_definition(quiz_id: int) -> QuizDefinition:
+    """Cached definition of the quiz. It is invalidated when a question or an answer of the quiz changes"""
+    version = get_quiz_definition_version(quiz_id)
+    key = DEFINITION_KEY.format(quiz_id, version)
+    definition = cache.get(key)
+    if definition is None:
+        definition = build_quiz_definition(quiz_id, version)
+        cache.set(key, definition, DEFINITION_TIMEOUT)
+    return definition
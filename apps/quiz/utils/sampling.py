@@ -0,0 +1,55 @@
+import random
+from collections import defaultdict
+
+from ..models import Question
+
+MAX_SEED = 2 ** 31 - 1
+
+
+def generate_seed() -> int:
+    return random.randint(0, MAX_SEED)
+
+
+def get_stratified_quotas(groups_sizes: dict, count: int) -> dict:
+    """Split the count between the groups in proportion to their sizes, by the largest remainders
+    :param groups_sizes: {group: size}
+    :return {group: count}
+    """
+    total = sum(groups_sizes.values())
+    quotas = {}
+    remainders = []
+    for group, size in groups_sizes.items():
+        quotas[group], remainder = divmod(count * size, total)
+        remainders.append((-remainder, group))
+    for _, group in sorted(remainders)[:count - sum(quotas.values())]:
+        quotas[group] += 1
+    return quotas
+
+
+def draw_questions(definition, count: int = None, stratify: bool = False, seed: int = None) -> list:
+    """Ids of the questions drawn for a taker from the quiz definition, in the order they are shown.
+    The same seed gives the same questions. Without a count all the questions are taken in the id order
+    """
+    questions = list(definition.questions)
+    if not count:
+        return [question.id for question in questions]
+
+    count = min(count, len(questions))
+    rng = random.Random(seed)
+    if stratify:
+        groups = defaultdict(list)
+        for question in questions:
+            groups[question.technique].append(question)
+        quotas = get_stratified_quotas({technique: len(group) for technique, group in groups.items()}, count)
+        drawn = []
+        for technique in sorted(groups):
+            drawn += rng.sample(groups[technique], quotas[technique])
+    else:
+        drawn = rng.sample(questions, count)
+    rng.shuffle(drawn)
+    return [question.id for question in drawn]
+
+
+def get_taker_questions(quiz_taker):
+    """Questions drawn for the taker, in the drawn order"""
+    return Question.objects.filter(users_answers__quiz_taker=quiz_taker).order_by('users_answers__id')
@@ -0,0 +1,195 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import QuizTaker, QuizStats, QuizScoreBucket, QuestionStats, UsersAnswer
+from .answers import QuizResult, grade_answers
+from .definitions import get_quiz_definition
+
+LEADERBOARD_SIZE = 10
+
+
+def is_passed(score: int, required_score_to_pass: int) -> bool:
+    return score >= required_score_to_pass
+
+
+def get_or_create_quiz_stats(quiz_id: int) -> QuizStats:
+    """The concurrent submits of a new quiz create the same row, the conflicts are ignored"""
+    QuizStats.objects.bulk_create([QuizStats(quiz_id=quiz_id)], ignore_conflicts=True)
+    return QuizStats.objects.get(quiz_id=quiz_id)
+
+
+def record_quiz_result(quiz_taker: QuizTaker, result: QuizResult, duration: int = None) -> None:
+    """Count the submitted result in the quiz statistics. The statistics contain the last submitted
+    result of every taker, as `rebuild_quiz_stats` computes them: a submit again replaces
+    the previous result of the taker, which is kept in the taker and in its answers.
+    :param duration: attempt duration in seconds, None if it is unknown
+    """
+    with transaction.atomic():
+        # Concurrent submits of the taker are applied one by one
+        submitted_at, previous_score, previous_duration = QuizTaker.objects.select_for_update().filter(
+            id=quiz_taker.id).values_list('submitted_at', 'score', 'duration').get()
+        required_score_to_pass = quiz_taker.quiz.required_score_to_pass
+        previous_results = dict(UsersAnswer.objects.filter(quiz_taker=quiz_taker).values_list(
+            'question_id', 'is_correct'))
+        is_resubmit = submitted_at is not None
+        passed = is_passed(result.score, required_score_to_pass)
+        if is_resubmit:
+            previous_passed = is_passed(previous_score, required_score_to_pass)
+        else:
+            previous_passed = False
+            previous_score = 0
+            previous_duration = None
+            previous_results = {}
+
+        stats = get_or_create_quiz_stats(quiz_taker.quiz_id)
+        QuizStats.objects.filter(id=stats.id).update(
+            attempts_count=F('attempts_count') + int(not is_resubmit),
+            passed_count=F('passed_count') + int(passed) - int(previous_passed),
+            total_score=F('total_score') + result.score - previous_score,
+            timed_attempts_count=F('timed_attempts_count') + int(duration is not None) - int(
+                previous_duration is not None),
+            total_duration=F('total_duration') + (duration or 0) - (previous_duration or 0),
+            updated_at=timezone.now(),
+        )
+
+        bucket = QuizScoreBucket.get_bucket(result.score)
+        QuizScoreBucket.objects.bulk_create([QuizScoreBucket(stats=stats, bucket=bucket)], ignore_conflicts=True)
+        QuizScoreBucket.objects.filter(stats=stats, bucket=bucket).update(count=F('count') + 1)
+        if is_resubmit:
+            QuizScoreBucket.objects.filter(stats=stats, bucket=QuizScoreBucket.get_bucket(previous_score)).update(
+                count=F('count') - 1)
+
+        # Questions of the previous result are counted already, only their correctness may change
+        new_question_ids = []
+        became_correct_ids = []
+        became_wrong_ids = []
+        for question in result.questions:
+            previous_is_correct = previous_results.get(question.question_id)
+            if previous_is_correct is None:
+                new_question_ids.append(question.question_id)
+                if question.is_correct:
+                    became_correct_ids.append(question.question_id)
+            elif previous_is_correct != question.is_correct:
+                (became_correct_ids if question.is_correct else became_wrong_ids).append(question.question_id)
+
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(stats=stats, question_id=question_id) for question_id in new_question_ids],
+            ignore_conflicts=True
+        )
+        QuestionStats.objects.filter(question_id__in=new_question_ids).update(answers_count=F('answers_count') + 1)
+        QuestionStats.objects.filter(question_id__in=became_correct_ids).update(correct_count=F('correct_count') + 1)
+        QuestionStats.objects.filter(question_id__in=became_wrong_ids).update(correct_count=F('correct_count') - 1)
+
+        # The result is kept to replace it with the next submit
+        save_taker_result(quiz_taker.id, result)
+        quiz_taker.submitted_at = timezone.now()
+        quiz_taker.duration = duration
+        QuizTaker.objects.filter(id=quiz_taker.id).update(
+            submitted_at=quiz_taker.submitted_at, duration=duration, score=result.score)
+
+
+def save_taker_result(quiz_taker_id: int, result: QuizResult) -> None:
+    correct_question_ids = [question.question_id for question in result.questions if question.is_correct]
+    wrong_question_ids = [question.question_id for question in result.questions if not question.is_correct]
+    UsersAnswer.objects.filter(quiz_taker_id=quiz_taker_id, question_id__in=correct_question_ids).update(
+        is_correct=True)
+    UsersAnswer.objects.filter(quiz_taker_id=quiz_taker_id, question_id__in=wrong_question_ids).update(
+        is_correct=False)
+
+
+def rebuild_quiz_stats(quiz_ids=None, chunk_size: int = 500) -> int:
+    """Recompute the statistics from the submitted quiz takers, reading them by chunks.
+    Every taker is counted with its last submitted result, as `record_quiz_result` counts it.
+    The answers of the takers submitted before the results were kept are graded and the results are saved.
+    :return count of the processed takers
+    """
+    takers = QuizTaker.objects.filter(submitted_at__isnull=False)
+    if quiz_ids is not None:
+        takers = takers.filter(quiz_id__in=quiz_ids)
+
+    attempts = Counter()
+    passed = Counter()
+    total_scores = Counter()
+    timed_attempts = Counter()
+    total_durations = Counter()
+    buckets = Counter()  # {(quiz id, bucket): count}
+    answers_counts = Counter()
+    correct_counts = Counter()
+    question_quizzes = {}
+    definitions = {}
+
+    processed_count = 0
+    last_id = 0
+    while True:
+        chunk = list(takers.filter(id__gt=last_id).order_by('id').values_list(
+            'id', 'quiz_id', 'score', 'duration', 'quiz__required_score_to_pass')[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        processed_count += len(chunk)
+
+        question_results = defaultdict(dict)  # {taker id: {question id: is correct}}
+        selected_answers = defaultdict(lambda: defaultdict(set))
+        rows = UsersAnswer.objects.filter(
+            quiz_taker_id__in=[taker_id for taker_id, *_ in chunk]
+        ).values_list('quiz_taker_id', 'question_id', 'is_correct', 'answers__id')
+        for taker_id, question_id, is_correct, answer_id in rows:
+            question_results[taker_id][question_id] = is_correct
+            question_answers = selected_answers[taker_id][question_id]  # The question is drawn for the taker
+            if answer_id is not None:
+                question_answers.add(answer_id)
+
+        for taker_id, quiz_id, score, duration, required_score_to_pass in chunk:
+            attempts[quiz_id] += 1
+            passed[quiz_id] += int(is_passed(score, required_score_to_pass))
+            total_scores[quiz_id] += score
+            if duration is not None:
+                timed_attempts[quiz_id] += 1
+                total_durations[quiz_id] += duration
+            buckets[quiz_id, QuizScoreBucket.get_bucket(score)] += 1
+
+            taker_results = question_results[taker_id]
+            if None in taker_results.values():
+                if quiz_id not in definitions:
+                    definitions[quiz_id] = get_quiz_definition(quiz_id)
+                taker_answers = selected_answers[taker_id]
+                result = grade_answers(definitions[quiz_id], taker_answers, taker_answers.keys())
+                save_taker_result(taker_id, result)
+                taker_results = {question.question_id: question.is_correct for question in result.questions}
+            for question_id, is_correct in taker_results.items():
+                question_quizzes[question_id] = quiz_id
+                answers_counts[question_id] += 1
+                correct_counts[question_id] += int(is_correct)
+
+    with transaction.atomic():
+        stats = QuizStats.objects.all()
+        if quiz_ids is not None:
+            stats = stats.filter(quiz_id__in=quiz_ids)
+        stats.delete()
+
+        QuizStats.objects.bulk_create([
+            QuizStats(quiz_id=quiz_id, attempts_count=count, passed_count=passed[quiz_id],
+                      total_score=total_scores[quiz_id], timed_attempts_count=timed_attempts[quiz_id],
+                      total_duration=total_durations[quiz_id])
+            for quiz_id, count in attempts.items()
+        ], batch_size=chunk_size)
+        stats_ids = dict(QuizStats.objects.filter(quiz_id__in=attempts.keys()).values_list('quiz_id', 'id'))
+        QuizScoreBucket.objects.bulk_create([
+            QuizScoreBucket(stats_id=stats_ids[quiz_id], bucket=bucket, count=count)
+            for (quiz_id, bucket), count in buckets.items()
+        ], batch_size=chunk_size)
+        QuestionStats.objects.bulk_create([
+            QuestionStats(stats_id=stats_ids[quiz_id], question_id=question_id,
+                          answers_count=answers_counts[question_id], correct_count=correct_counts[question_id])
+            for question_id, quiz_id in question_quizzes.items()
+        ], batch_size=chunk_size)
+    return processed_count
+
+
+def get_leaderboard(quiz, limit: int = LEADERBOARD_SIZE):
+    """Best takers of the quiz, the earlier taker is higher with the same score"""
+    return QuizTaker.objects.filter(quiz=quiz, completed=True).select_related('user__profile').order_by(
+        '-score', 'date_created')[:limit]